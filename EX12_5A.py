@@ -5,7 +5,171 @@
 # based on the theoretical and algorithmic principles presented in the course lecture slides.
 # --------------------------------------------------------------
 
-from typing import List
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+import instrumentation
+from ballots import weighted_sections
+from quantile_sketch import QuantileSketch, weighted_order_statistics
+
+# Number of t values evaluated per round of the vectorized k-ary search that narrows the bracket around
+# the root, and the maximum number of rounds before the remaining breakpoints are enumerated.
+_SEARCH_POINTS = 64
+_MAX_SEARCH_ROUNDS = 64
+
+
+def _medians_for_ts(lookup: Callable, m: int, n: int, total_budget: float, ts: np.ndarray):
+    """
+    Computes the generalized median of every section for a whole vector of t values at once.
+
+    The median of a section's n sorted citizen votes together with the (n-1) virtual votes equals
+    min over q in [-1, n-2] of max(votes[n-2-q], total_budget*min(1, (q+1)t)). The first term decreases
+    and the second increases with q, so the crossing q is found by a binary search that runs in lockstep
+    for every (t, section) pair.
+
+    Args:
+        lookup (Callable): lookup(rows, idx) returns the idx-th smallest (0-based) citizen vote of each section in rows.
+        m (int): The number of sections.
+        n (int): The number of citizens.
+        total_budget (float): The total available budget.
+        ts (np.ndarray): Vector of k values of t.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Arrays of shape (k, m) with the median of each section for each t,
+            and the index q of the first virtual vote that is not below votes[n-2-q] (n-1 if none is).
+    """
+    ts = np.asarray(ts, dtype=float)[:, None]
+    cols = np.arange(m)
+    lo = np.zeros((ts.shape[0], m), dtype=np.intp)
+    hi = np.full_like(lo, n - 1)
+    for _ in range((n - 1).bit_length()):
+        active = lo < hi
+        mid = (lo + hi) // 2
+        crossed = total_budget * np.minimum(1, (mid + 1) * ts) >= lookup(cols, np.maximum(n - 2 - mid, 0))
+        hi = np.where(active & crossed, mid, hi)
+        lo = np.where(active & ~crossed, mid + 1, lo)
+    medians = lookup(cols, n - 1 - lo)
+    virtual = total_budget * np.minimum(1, (lo + 1) * ts)
+    return np.where(lo < n - 1, np.minimum(medians, virtual), medians), lo
+
+
+def _breakpoints_between(lookup: Callable, m: int, n: int, total_budget: float, left: float, right: float,
+                         q_left: np.ndarray, q_right: np.ndarray) -> np.ndarray:
+    """
+    Enumerates the values of t in (left, right) where some section's median may change slope.
+    Virtual vote q saturates at 1/(q+1), and can only become the median while crossing votes[n-2-q]
+    or votes[n-1-q]; the crossing index only moves from q_left down to q_right inside the bracket,
+    so only those virtual votes are considered. Between consecutive breakpoints every median is linear in t.
+    """
+    found = []
+    for j in range(m):
+        q = np.arange(q_right[j], min(q_left[j], n - 2) + 1)
+        scale = total_budget * (q + 1)
+        for block in (1 / (q + 1), lookup(j, n - 2 - q) / scale, lookup(j, n - 1 - q) / scale):
+            found.append(block[(block > left) & (block < right)])
+    return np.unique(np.concatenate(found))
+
+
+def _solve(lookup: Callable, m: int, n: int, total_budget: float) -> Tuple[np.ndarray, float]:
+    """
+    Finds t in [0, 1] such that the sum of the generalized medians equals the total budget.
+
+    The sum of medians is a continuous, non-decreasing, piecewise linear function of t. A k-ary search
+    evaluates it on a grid of t values per round to narrow the bracket around the total budget, then the
+    few breakpoints left inside the bracket are enumerated and t is solved for exactly on the linear
+    segment that contains the total budget.
+
+    Returns:
+        Tuple[np.ndarray, float]: The median of each section at the solution, and the solution t.
+    """
+    def medians_for_ts(ts):
+        return _medians_for_ts(lookup, m, n, total_budget, ts)
+
+    medians, crossing = medians_for_ts(np.array([0.0, 1.0]))
+    (left, right), (s_left, s_right) = (0.0, 1.0), medians.sum(axis=1)
+    (q_left, q_right) = crossing
+    if s_left >= total_budget:
+        return medians[0], left
+    if s_right <= total_budget:
+        return medians[1], right
+
+    # Narrow the bracket until few candidate breakpoints remain inside it
+    for _ in range(_MAX_SEARCH_ROUNDS):
+        if np.sum(q_left - q_right) <= _SEARCH_POINTS * m:
+            break
+        ts = np.linspace(left, right, _SEARCH_POINTS + 2)[1:-1]
+        medians, crossing = medians_for_ts(ts)
+        sums = medians.sum(axis=1)
+        k = np.searchsorted(sums, total_budget)
+        if k < len(ts) and sums[k] == total_budget:
+            return medians[k], ts[k]
+        if k > 0:
+            left, s_left, q_left = ts[k - 1], sums[k - 1], crossing[k - 1]
+        if k < len(ts):
+            right, s_right, q_right = ts[k], sums[k], crossing[k]
+
+    inner = _breakpoints_between(lookup, m, n, total_budget, left, right, q_left, q_right)
+    if len(inner):
+        medians, _ = medians_for_ts(inner)
+        sums = medians.sum(axis=1)
+        k = np.searchsorted(sums, total_budget)
+        if k < len(inner) and sums[k] == total_budget:
+            return medians[k], inner[k]
+        if k > 0:
+            left, s_left = inner[k - 1], sums[k - 1]
+        if k < len(inner):
+            right, s_right = inner[k], sums[k]
+
+    # The sum of medians is linear on [left, right]: solve for t directly
+    t = left + (total_budget - s_left) * (right - left) / (s_right - s_left)
+    return medians_for_ts(np.array([t]))[0][0], t
+
+
+def _order_statistics(sections: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[int, Callable]:
+    if weights is None:
+        return sections.shape[1], lambda rows, idx: sections[rows, idx]
+    return weighted_order_statistics(sections, weights)
+
+
+def compute_budget_sorted(total_budget: float, sections: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Computes the generalized median allocation from votes that are already sorted per section.
+
+    Args:
+        total_budget (float): The total available budget to be distributed among all sections.
+        sections (np.ndarray): Array of shape (m, L), where row j holds the votes for section j sorted in ascending order.
+        weights (Optional[np.ndarray]): Array of shape (m, L) with the number of citizens casting each vote in
+            sections; every row must sum to the same number of citizens n. If omitted, every vote counts once.
+
+    Returns:
+        np.ndarray: The calculated budget allocation for each section (length m).
+    """
+    n, lookup = _order_statistics(sections, weights)
+    with instrumentation.phase("compute_budget", "solve", citizens=n, sections=sections.shape[0]):
+        return _solve(lookup, sections.shape[0], n, total_budget)[0]
+
+
+def compute_budget_array(total_budget: float, citizen_votes: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized NumPy version of compute_budget for an (n, m) array of votes.
+
+    Args:
+        total_budget (float): The total available budget to be distributed among all sections.
+        citizen_votes (np.ndarray): Array of shape (n, m), where row i holds the votes of citizen i for all m sections.
+        weights (Optional[np.ndarray]): Integer number of citizens casting each row of citizen_votes, e.g. the
+            counts of ballots.ballot_classes; the medians are then weighted medians.
+
+    Returns:
+        np.ndarray: The calculated budget allocation for each section (length m).
+    """
+    votes = np.asarray(citizen_votes, dtype=float)
+    with instrumentation.phase("compute_budget", "sort", citizens=votes.shape[0], sections=votes.shape[1]):
+        if weights is not None:
+            sections, weights = weighted_sections(votes, weights)
+        else:
+            sections = np.sort(np.ascontiguousarray(votes.T), axis=1)
+    return compute_budget_sorted(total_budget, sections, weights)
 
 
 def compute_budget(total_budget: float, citizen_votes: List[List[float]]) -> List[float]:
@@ -14,6 +178,7 @@ def compute_budget(total_budget: float, citizen_votes: List[List[float]]) -> Lis
     as described in the lecture slides.
     The algorithm adds (n-1) fixed linear "virtual" votes for each section, then finds t in [0, 1] so that
     the sum of medians over all sections equals the total budget.
+    This is a thin wrapper around compute_budget_array, which solves for t exactly.
 
     Args:
         total_budget (float): The total available budget to be distributed among all sections.
@@ -23,51 +188,42 @@ def compute_budget(total_budget: float, citizen_votes: List[List[float]]) -> Lis
     Returns:
         List[float]: The calculated budget allocation for each section (length m), such that the total sum matches total_budget.
     """
-    n = len(citizen_votes)
-    m = len(citizen_votes[0])
-
-    def allocation_for_t(t: float) -> List[float]:
-        """
-        Helper function that computes the allocation for a given t value,
-        by adding (n-1) fixed linear votes to each section and taking the median.
-
-        Args:
-            t (float): The parameter controlling the fixed votes.
-
-        Returns:
-            List[float]: The median allocation for each section.
-        """
-        res = []
-        for j in range(m):
-            section_votes = [citizen_votes[i][j] for i in range(n)]
-            # Add (n-1) fixed linear virtual votes to each section, as per the linear function definition
-            fixed_votes = [total_budget * min(1, (i + 1) * t) for i in range(n - 1)]
-            all_votes = section_votes + fixed_votes
-            all_votes.sort()
-            L = len(all_votes)
-            # Compute the median
-            if L % 2 == 1:
-                median = all_votes[L // 2]
-            else:
-                median = (all_votes[L // 2 - 1] + all_votes[L // 2]) / 2
-            res.append(median)
-        return res
-
-    # Binary search to find t such that the sum of medians equals total_budget
-    left, right = 0.0, 1.0
-    for _ in range(50):  # Sufficient precision
-        mid = (left + right) / 2
-        allocation = allocation_for_t(mid)
-        s = sum(allocation)
-        if abs(s - total_budget) < 1e-6:
-            return allocation
-        if s > total_budget:
-            right = mid
-        else:
-            left = mid
-    return allocation_for_t((left + right) / 2)
+    return compute_budget_array(total_budget, np.array(citizen_votes, dtype=float)).tolist()
+
 
 
+def compute_budget_sketch(total_budget: float, ballots: Union[QuantileSketch, Iterable], eps: float = 0.01) -> dict:
+    """
+    Approximate mode of compute_budget for ballot sets that do not fit in memory.
+
+    The allocation is computed on a quantile sketch of every section instead of the full vote matrix.
+    Because every order statistic of the sketch is within rank_error ranks of the true one, solving the rule
+    once more on the sketch shifted down and up by rank_error ranks brackets the exact allocation.
+
+    Args:
+        total_budget (float): The total available budget to be distributed among all sections.
+        ballots (Union[QuantileSketch, Iterable]): A (possibly merged) QuantileSketch, or an iterable of ballot
+            chunks of shape (b, m) to build one from.
+        eps (float): Target rank error of the sketch as a fraction of the number of ballots, when one is built.
+
+    Returns:
+        dict: "allocation" computed on the sketch, per-section "lower" and "upper" bounds that contain the exact
+            allocation, and the sketch's "rank_error" in ballots.
+    """
+    sketch = ballots if isinstance(ballots, QuantileSketch) else QuantileSketch.from_chunks(ballots, eps)
+    m = sketch.num_sections
+    n, lookup = weighted_order_statistics(*sketch.sections())
+    allocation, _ = _solve(lookup, m, n, total_budget)
+    (lower_values, lower_weights), (upper_values, upper_weights) = sketch.bounding_sections()
+    _, lower_lookup = weighted_order_statistics(lower_values, lower_weights)
+    _, upper_lookup = weighted_order_statistics(upper_values, upper_weights)
+    # The sums of medians satisfy lower <= exact <= upper for every t, so t_upper <= t_exact <= t_lower
+    _, t_upper = _solve(upper_lookup, m, n, total_budget)
+    _, t_lower = _solve(lower_lookup, m, n, total_budget)
+    lower, _ = _medians_for_ts(lower_lookup, m, n, total_budget, np.array([t_upper]))
+    upper, _ = _medians_for_ts(upper_lookup, m, n, total_budget, np.array([t_lower]))
+    return {"allocation": allocation, "lower": lower[0], "upper": upper[0], "rank_error": sketch.rank_error}
+
 # ---------- TESTS ----------
 
 def test_compute_budget():
@@ -110,5 +266,5 @@ def test_compute_budget():
         print('-' * 50)
 
 
-# Run tests:
-test_compute_budget()
+if __name__ == "__main__":
+    test_compute_budget()
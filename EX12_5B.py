@@ -8,7 +8,77 @@
 # All documentation, explanations, and proof are provided in English.
 # --------------------------------------------------------------
 
-from typing import List
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+
+from ballots import weighted_sections
+from quantile_sketch import QuantileSketch, weighted_order_statistics
+
+
+def _section_medians(citizen_votes: np.ndarray) -> np.ndarray:
+    """
+    Computes the median of every section (column) of an (n, m) vote array in one partition pass.
+    Sections are laid out contiguously first, so each partition scans contiguous memory; for an even n
+    the lower middle vote is the maximum of the partitioned lower half.
+    """
+    n = citizen_votes.shape[0]
+    sections = np.ascontiguousarray(citizen_votes.T)
+    part = np.partition(sections, n // 2, axis=1)
+    upper = part[:, n // 2]
+    if n % 2 == 1:
+        return upper
+    return (part[:, :n // 2].max(axis=1) + upper) / 2
+
+
+def _weighted_section_medians(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Computes the median of every section from sorted votes (m, L) and their multiplicities (m, L).
+    """
+    n, lookup = weighted_order_statistics(values, weights)
+    rows = np.arange(values.shape[0])
+    return (lookup(rows, (n - 1) // 2) + lookup(rows, n // 2)) / 2
+
+
+def compute_budget_efficient_array(total_budget: float, citizen_votes: np.ndarray,
+                                   weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized NumPy version of compute_budget_efficient for an (n, m) array of votes.
+
+    Args:
+        total_budget (float): The total budget to allocate across all sections.
+        citizen_votes (np.ndarray): Array of shape (n, m), where row i is citizen i's proposed allocation.
+        weights (Optional[np.ndarray]): Integer number of citizens casting each row of citizen_votes, e.g. the
+            counts of ballots.ballot_classes; the medians are then weighted medians.
+
+    Returns:
+        np.ndarray: The normalized allocation per section, with total sum matching total_budget.
+    """
+    votes = np.asarray(citizen_votes, dtype=float)
+    if weights is not None:
+        return normalize_medians(total_budget, _weighted_section_medians(*weighted_sections(votes, weights)))
+    return normalize_medians(total_budget, _section_medians(votes))
+
+
+def normalize_medians(total_budget: float, medians: np.ndarray) -> np.ndarray:
+    """
+    Scales the per-section medians proportionally so that they sum to total_budget.
+
+    Args:
+        total_budget (float): The total budget to allocate across all sections.
+        medians (np.ndarray): The median vote of each section.
+
+    Returns:
+        np.ndarray: The normalized allocation per section.
+    """
+    m = len(medians)
+    sum_medians = medians.sum()
+    if abs(sum_medians - total_budget) < 1e-6:
+        return medians
+    if sum_medians == 0:
+        # Avoid division by zero (all medians are zero)
+        return np.full(m, total_budget / m)
+    return medians * (total_budget / sum_medians)
 
 
 def compute_budget_efficient(total_budget: float, citizen_votes: List[List[float]]) -> List[float]:
@@ -16,6 +86,7 @@ def compute_budget_efficient(total_budget: float, citizen_votes: List[List[float
     Efficiently computes a budget allocation vector by taking the median of each section's votes,
     then normalizing the vector so that the total sum equals the required total_budget.
     This method does not use binary search and is based on the per-section median normalization approach.
+    This is a thin wrapper around compute_budget_efficient_array.
 
     Args:
         total_budget (float): The total budget to allocate across all sections.
@@ -24,29 +95,43 @@ def compute_budget_efficient(total_budget: float, citizen_votes: List[List[float
     Returns:
         List[float]: The normalized allocation per section, with total sum exactly matching total_budget.
     """
-    n = len(citizen_votes)
-    m = len(citizen_votes[0])
-    medians = []
-    for j in range(m):
-        votes = [citizen_votes[i][j] for i in range(n)]
-        votes.sort()
-        L = len(votes)
-        if L % 2 == 1:
-            median = votes[L // 2]
-        else:
-            median = (votes[L // 2 - 1] + votes[L // 2]) / 2
-        medians.append(median)
-    sum_medians = sum(medians)
-    if abs(sum_medians - total_budget) < 1e-6:
-        return medians
-    else:
-        if sum_medians == 0:
-            # Avoid division by zero (all medians are zero)
-            return [total_budget / m] * m
-        factor = total_budget / sum_medians
-        return [x * factor for x in medians]
+    return compute_budget_efficient_array(total_budget, np.array(citizen_votes, dtype=float)).tolist()
+
 
 
+def compute_budget_efficient_sketch(total_budget: float, ballots: Union[QuantileSketch, Iterable],
+                                    eps: float = 0.01) -> dict:
+    """
+    Approximate mode of compute_budget_efficient for ballot sets that do not fit in memory.
+
+    The section medians are read from a quantile sketch instead of the full vote matrix. Every order
+    statistic of the sketch is within rank_error ranks of the true one, which bounds each true median;
+    the bounds are then carried through the normalization.
+
+    Args:
+        total_budget (float): The total budget to allocate across all sections.
+        ballots (Union[QuantileSketch, Iterable]): A (possibly merged) QuantileSketch, or an iterable of ballot
+            chunks of shape (b, m) to build one from.
+        eps (float): Target rank error of the sketch as a fraction of the number of ballots, when one is built.
+
+    Returns:
+        dict: "allocation" computed on the sketch, per-section "lower" and "upper" bounds that contain the exact
+            allocation, and the sketch's "rank_error" in ballots.
+    """
+    sketch = ballots if isinstance(ballots, QuantileSketch) else QuantileSketch.from_chunks(ballots, eps)
+    m = sketch.num_sections
+    allocation = normalize_medians(total_budget, _weighted_section_medians(*sketch.sections()))
+    lower_sections, upper_sections = sketch.bounding_sections()
+    low = _weighted_section_medians(*lower_sections)
+    high = _weighted_section_medians(*upper_sections)
+    # A section's share is smallest when its median is low and all the others are high, and vice versa
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower = total_budget * low / (low + high.sum() - high)
+        upper = total_budget * high / (high + low.sum() - low)
+    lower = np.where(np.isfinite(lower), lower, total_budget / m)
+    upper = np.where(np.isfinite(upper), upper, total_budget / m)
+    return {"allocation": allocation, "lower": lower, "upper": upper, "rank_error": sketch.rank_error}
+
 # ---------- TESTS ----------
 
 def test_compute_budget_efficient():
@@ -89,12 +174,9 @@ def test_compute_budget_efficient():
         print('-' * 50)
 
 
-# Run tests:
-test_compute_budget_efficient()
-
 # ------------------ EXPLANATION AND PROOF ------------------
 
-print("""
+EXPLANATION = """
 ------------------------------------------------------
 Explanation and Proof of Correctness:
 
@@ -123,4 +205,9 @@ The efficient median-and-normalization algorithm produces a fair, Pareto-efficie
 
 Note: This explanation and proof were written and generated by artificial intelligence (ChatGPT, OpenAI), based on the principles described in the course materials.
 ------------------------------------------------------
-""")
+"""
+
+
+if __name__ == "__main__":
+    test_compute_budget_efficient()
+    print(EXPLANATION)
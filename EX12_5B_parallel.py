@@ -0,0 +1,127 @@
+"""
+Parallel modes of the EX12_5B median rule (compute_budget_efficient) for very large ballot sets.
+
+Sections are independent, so the thread mode hands groups of sections to a thread pool; NumPy releases
+the GIL while it copies and partitions them. The process mode shards the ballots instead: the votes are
+placed once in shared memory, every worker process sorts its shard and counts it against a set of
+candidate pivots, and the exact medians are found by a two-round distributed selection, so only counts
+and a small slice of the votes ever travel between processes.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from EX12_5B import _section_medians, normalize_medians
+
+# Number of sampled votes per section used to choose the pivots, and the number of pivots per section
+_SAMPLE_SIZE = 1 << 16
+_PIVOTS = 1024
+
+_shard = None
+
+
+def _attach(name: str, m: int, n: int):
+    global _shard
+    memory = shared_memory.SharedMemory(name=name)
+    # Keep a reference to the block, so the view below stays valid for the life of the worker
+    _shard = (memory, np.ndarray((m, n), dtype=np.float64, buffer=memory.buf))
+
+
+def _count_below(task):
+    """
+    Sorts the shard's votes of every section in place, then returns for every section j and pivot b:
+    #(votes < pivot) and #(votes <= pivot).
+    """
+    start, stop, pivots = task
+    sections = _shard[1][:, start:stop]
+    sections.sort(axis=1)
+    less = np.empty(pivots.shape, dtype=np.int64)
+    less_equal = np.empty(pivots.shape, dtype=np.int64)
+    for j, row in enumerate(sections):
+        less[j] = np.searchsorted(row, pivots[j], side="left")
+        less_equal[j] = np.searchsorted(row, pivots[j], side="right")
+    return less, less_equal
+
+
+def _collect_between(task):
+    """For every section j and interval r: the votes of the (sorted) shard strictly between low[j, r] and high[j, r]."""
+    start, stop, low, high = task
+    sections = _shard[1][:, start:stop]
+    return [[row[np.searchsorted(row, lo, side="right"):np.searchsorted(row, hi, side="left")]
+             for lo, hi in zip(low[j], high[j])] for j, row in enumerate(sections)]
+
+
+def _distributed_medians(sections: np.ndarray, pool, bounds, rng) -> np.ndarray:
+    m, n = sections.shape
+    ranks = np.array([(n - 1) // 2, n // 2])
+    # Pivots are sampled votes, so a median that equals a frequent vote is usually hit exactly;
+    # -inf and +inf close the outer intervals
+    sample = np.sort(sections[:, rng.integers(0, n, min(n, _SAMPLE_SIZE))], axis=1)
+    picks = np.linspace(0, sample.shape[1] - 1, min(_PIVOTS, sample.shape[1])).astype(int)
+    pivots = np.hstack([np.full((m, 1), -np.inf), sample[:, picks], np.full((m, 1), np.inf)])
+
+    counts = pool.map(_count_below, [(start, stop, pivots) for start, stop in bounds])
+    less = sum(c[0] for c in counts)
+    less_equal = sum(c[1] for c in counts)
+
+    # The k-th smallest vote (0-based) is at most the first pivot b with #(votes <= pivot b) > k; it equals
+    # that pivot if #(votes < pivot b) <= k, and otherwise lies strictly between pivots b-1 and b
+    rows = np.arange(m)[:, None]
+    b = np.array([[np.searchsorted(less_equal[j], k, side="right") for k in ranks] for j in range(m)])
+    exact = less[rows, b] <= ranks
+    low = np.where(exact, 0.0, pivots[rows, np.maximum(b - 1, 0)])
+    high = np.where(exact, 0.0, pivots[rows, b])
+    below = less_equal[rows, np.maximum(b - 1, 0)]
+
+    values = np.where(exact, pivots[rows, b], np.nan)
+    if not exact.all():
+        parts = pool.map(_collect_between, [(start, stop, low, high) for start, stop in bounds])
+        for j, r in zip(*np.nonzero(~exact)):
+            between = np.concatenate([part[j][r] for part in parts])
+            values[j, r] = np.partition(between, ranks[r] - below[j, r])[ranks[r] - below[j, r]]
+    return values.mean(axis=1)
+
+
+def compute_budget_efficient_parallel(total_budget: float, citizen_votes: np.ndarray, threads: Optional[int] = None,
+                                      processes: Optional[int] = None, seed: int = 0) -> np.ndarray:
+    """
+    Parallel version of compute_budget_efficient_array for an (n, m) array of votes; the result is the same.
+
+    Args:
+        total_budget (float): The total budget to allocate across all sections.
+        citizen_votes (np.ndarray): Array of shape (n, m), where row i is citizen i's proposed allocation.
+        threads (Optional[int]): Size of the thread pool that the sections are split over when processes is
+            not given; defaults to the number of cores.
+        processes (Optional[int]): If given, the ballots are sharded over this many worker processes that
+            share the votes through shared memory, and the exact medians are found by distributed selection.
+        seed (int): Seed of the pivot sample in the process mode (the result does not depend on it).
+
+    Returns:
+        np.ndarray: The normalized allocation per section, with total sum matching total_budget.
+    """
+    votes = np.asarray(citizen_votes, dtype=float)
+    n, m = votes.shape
+    if processes is None:
+        workers = min(threads or os.cpu_count() or 1, m)
+        groups = [g for g in np.array_split(np.arange(m), workers) if len(g)]
+        with ThreadPoolExecutor(len(groups)) as pool:
+            medians = np.concatenate(list(pool.map(lambda g: _section_medians(votes[:, g]), groups)))
+        return normalize_medians(total_budget, medians)
+
+    memory = shared_memory.SharedMemory(create=True, size=max(votes.nbytes, 1))
+    try:
+        sections = np.ndarray((m, n), dtype=np.float64, buffer=memory.buf)
+        sections[:] = votes.T
+        edges = np.linspace(0, n, processes + 1).astype(int)
+        bounds = [(start, stop) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+        with Pool(len(bounds), initializer=_attach, initargs=(memory.name, m, n)) as pool:
+            medians = _distributed_medians(sections, pool, bounds, np.random.default_rng(seed))
+        del sections
+    finally:
+        memory.close()
+        memory.unlink()
+    return normalize_medians(total_budget, medians)
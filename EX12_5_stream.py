@@ -0,0 +1,122 @@
+"""
+Incremental ballot aggregation for the median budget rules of EX12_5A and EX12_5B.
+Ballots can be added and removed one at a time while the current allocation stays available,
+without reprocessing the whole vote matrix on every refresh.
+"""
+
+from typing import List
+
+import numpy as np
+
+from EX12_5A import compute_budget_sorted
+from EX12_5B import normalize_medians
+
+
+class BallotAggregator:
+    """
+    Keeps the votes of every section in a sorted array, so order statistics are available directly.
+
+    Adding or removing a ballot costs a binary search per section (O(m*log(n)) comparisons) plus shifting
+    the tail of each sorted array in place. The EX12_5B normalized medians are then read in O(m), and the
+    EX12_5A generalized-median allocation is solved on the already sorted sections.
+
+    Parameters
+    ----------
+    total_budget : float
+        The total budget to allocate across all sections.
+    num_sections : int
+        The number of sections m; every ballot must hold one vote per section.
+    capacity : int
+        Initial number of ballots to reserve room for; the storage grows automatically.
+    """
+
+    def __init__(self, total_budget: float, num_sections: int, capacity: int = 1024):
+        if num_sections <= 0:
+            raise ValueError("There must be at least one section.")
+        self.total_budget = total_budget
+        self.num_sections = num_sections
+        self._sections = np.empty((num_sections, max(capacity, 1)))
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _as_ballots(self, ballots) -> np.ndarray:
+        ballots = np.asarray(ballots, dtype=float)
+        if ballots.ndim != 2 or ballots.shape[1] != self.num_sections:
+            raise ValueError("Each ballot must contain one vote per section.")
+        return ballots
+
+    def _reserve(self, count: int):
+        capacity = self._sections.shape[1]
+        if count <= capacity:
+            return
+        grown = np.empty((self.num_sections, max(count, 2 * capacity)))
+        grown[:, :self._count] = self._sections[:, :self._count]
+        self._sections = grown
+
+    def add_ballot(self, ballot: List[float]):
+        """Adds one citizen's ballot (one vote per section)."""
+        ballot = self._as_ballots([ballot])[0]
+        n = self._count
+        self._reserve(n + 1)
+        for j, vote in enumerate(ballot):
+            row = self._sections[j]
+            k = np.searchsorted(row[:n], vote)
+            row[k + 1:n + 1] = row[k:n]
+            row[k] = vote
+        self._count = n + 1
+
+    def add_ballots(self, ballots):
+        """Adds many ballots at once, given as an (k, m) array or list of lists."""
+        ballots = self._as_ballots(ballots)
+        n = self._count
+        self._reserve(n + len(ballots))
+        self._sections[:, n:n + len(ballots)] = ballots.T
+        self._sections[:, :n + len(ballots)].sort(axis=1)
+        self._count = n + len(ballots)
+
+    def remove_ballot(self, ballot: List[float]):
+        """
+        Removes a previously added ballot.
+        Raises ValueError if one of its votes is not currently present in its section.
+        """
+        ballot = self._as_ballots([ballot])[0]
+        n = self._count
+        positions = []
+        for j, vote in enumerate(ballot):
+            row = self._sections[j, :n]
+            k = np.searchsorted(row, vote)
+            if k == n or row[k] != vote:
+                raise ValueError("Ballot was not added to the aggregator.")
+            positions.append(k)
+        for j, k in enumerate(positions):
+            row = self._sections[j]
+            row[k:n - 1] = row[k + 1:n]
+        self._count = n - 1
+
+    def sorted_sections(self) -> np.ndarray:
+        """Returns a read-only (m, n) view of the votes of every section, sorted in ascending order."""
+        view = self._sections[:, :self._count]
+        view.flags.writeable = False
+        return view
+
+    def medians(self) -> np.ndarray:
+        """Returns the current median vote of every section."""
+        n = self._count
+        if n == 0:
+            raise ValueError("No ballots have been added.")
+        upper = self._sections[:, n // 2]
+        if n % 2 == 1:
+            return upper.copy()
+        return (self._sections[:, n // 2 - 1] + upper) / 2
+
+    def efficient_allocation(self) -> np.ndarray:
+        """Returns the EX12_5B allocation: the section medians normalized to the total budget."""
+        return normalize_medians(self.total_budget, self.medians())
+
+    def allocation(self) -> np.ndarray:
+        """Returns the EX12_5A generalized-median allocation with (n-1) linear virtual votes."""
+        if self._count == 0:
+            raise ValueError("No ballots have been added.")
+        return compute_budget_sorted(self.total_budget, self._sections[:, :self._count])
@@ -1,26 +1,257 @@
 import cvxpy as cp
+import highspy
 import numpy as np
+import scipy.sparse as sp
 
-def alloc(mat):
+import instrumentation
+from allocations import spread_unvalued
+
+_problems = {}
+_leximin_problems = {}
+
+def _problem(n, m):
+    # One compiled max-min program per (n, m) shape; only the value matrix changes between solves
+    if (n, m) not in _problems:
+        vals = cp.Parameter((n, m))
+        x = cp.Variable((n, m))
+        t = cp.Variable()
+        cons = [
+            cp.sum(x, axis=0) == 1,
+            x >= 0,
+            cp.sum(cp.multiply(vals, x), axis=1) >= t,
+        ]
+        _problems[(n, m)] = (cp.Problem(cp.Maximize(t), cons), vals, x)
+    return _problems[(n, m)]
+
+def _leximin_problem(n, m):
+    # Agents with free[i] = 1 are raised together to t; the others are held at their fixed level
+    if (n, m) not in _leximin_problems:
+        vals = cp.Parameter((n, m))
+        free = cp.Parameter(n, nonneg=True)
+        level = cp.Parameter(n)
+        x = cp.Variable((n, m))
+        t = cp.Variable()
+        values = cp.sum(cp.multiply(vals, x), axis=1) >= level + cp.multiply(free, t)
+        cons = [
+            cp.sum(x, axis=0) == 1,
+            x >= 0,
+            values,
+        ]
+        _leximin_problems[(n, m)] = (cp.Problem(cp.Maximize(t), cons), vals, free, level, x, t, values)
+    return _leximin_problems[(n, m)]
+
+def _leximin(mat):
+    n, m = mat.shape
+    prob, vals, free, level, x, t, values = _leximin_problem(n, m)
+    vals.value = mat
+    is_free = np.ones(n, dtype=bool)
+    fixed = np.zeros(n)
+    while True:
+        free.value = is_free.astype(float)
+        level.value = fixed
+        instrumentation.solve("Ex3.alloc", prob, warm_start=False)
+        if prob.status not in ["optimal", "optimal_inaccurate"]:
+            raise RuntimeError("No optimal solution found.")
+        # A positive dual marks an agent whose value is tight in every optimum of this round, so it
+        # cannot be raised further; the duals of the free agents sum to 1, so at least one is positive
+        duals = np.where(is_free, values.dual_value, 0)
+        saturated = duals > 1e-6
+        if not saturated.any():
+            saturated[np.argmax(duals)] = True
+        # Hold the level slightly below t so that the next round stays feasible despite solver tolerance
+        fixed[saturated] = t.value - 1e-7 * max(1.0, abs(t.value))
+        is_free &= ~saturated
+        if not is_free.any():
+            return x.value
+
+def _alloc_sparse(mat):
+    # One variable per nonzero valuation: only agents that value a resource can get a share of it
+    with instrumentation.phase("Ex3.alloc", "build", agents=mat.shape[0], resources=mat.shape[1]):
+        mat = sp.csr_matrix(mat, dtype=float)
+        mat.eliminate_zeros()
+        n, m = mat.shape
+        entries = np.arange(mat.nnz)
+        rows = np.repeat(np.arange(n), np.diff(mat.indptr))
+        values = sp.csr_matrix((mat.data, (rows, entries)), shape=(n, mat.nnz))
+        supply = sp.csr_matrix((np.ones(mat.nnz), (mat.indices, entries)), shape=(m, mat.nnz))
+        valued = np.diff(supply.indptr) > 0
+        if mat.nnz == 0:
+            return spread_unvalued(sp.csr_matrix((n, m)), valued)
+
+        x = cp.Variable(mat.nnz, nonneg=True)
+        t = cp.Variable()
+        cons = [
+            supply[valued] @ x == 1,
+            values @ x >= t,
+        ]
+        prob = cp.Problem(cp.Maximize(t), cons)
+    instrumentation.solve("Ex3.alloc", prob)
+    if prob.status not in ["optimal", "optimal_inaccurate"]:
+        raise RuntimeError("No optimal solution found.")
+    with instrumentation.phase("Ex3.alloc", "extract"):
+        return spread_unvalued(sp.csr_matrix((x.value, mat.indices, mat.indptr), shape=(n, m)), valued)
+
+def alloc(mat, decimals=None, leximin=False):
+    """
+    Egalitarian allocation: maximizes the smallest agent value. Returns an (n, m) ndarray of
+    resource shares, rounded to the given number of decimals if decimals is set.
+    With leximin=True the allocation is lexicographically max-min: after the smallest value,
+    the second smallest is maximized, and so on.
+    A scipy.sparse value matrix is solved with variables only on its nonzero entries, and the
+    allocation is returned as a sparse matrix (resources nobody values are split evenly).
+    """
+    if sp.issparse(mat):
+        if leximin:
+            raise ValueError("leximin mode needs a dense value matrix.")
+        res = _alloc_sparse(mat)
+        if decimals is not None:
+            res.data = np.round(res.data, decimals)
+        return res
+    mat = np.array(mat, dtype=float)
+    if leximin:
+        res = _leximin(mat)
+    else:
+        with instrumentation.phase("Ex3.alloc", "build", agents=mat.shape[0], resources=mat.shape[1]):
+            prob, vals, x = _problem(*mat.shape)
+            vals.value = mat
+        # Only the compiled problem is reused: re-solving from the previous solver state makes the
+        # chosen optimum depend on which profile was solved before
+        instrumentation.solve("Ex3.alloc", prob, warm_start=False)
+        res = x.value
+
+    if decimals is not None:
+        with instrumentation.phase("Ex3.alloc", "extract"):
+            res = np.round(res, decimals)
+    return res
+
+def _split_at(order, s, n_items):
+    # Agent 1 gets the first s resources in the given order (the last one possibly in part), agent 2 the rest
+    share = np.zeros(n_items)
+    k = int(np.floor(s))
+    share[order[:k]] = 1
+    if k < n_items:
+        share[order[k]] = s - k
+    return np.vstack([share, 1 - share])
+
+def _two_agent_split(mat):
+    """
+    Exact max-min split between two agents in O(m log m). Resources are sorted by the ratio of the
+    agents' values, so every efficient split gives agent 1 a prefix; agent 1's value f(s) grows and
+    agent 2's value g(s) shrinks along the prefix length s, and the optimum is where they cross.
+    When the optimum is reached on a whole range of s, the end that is better for the other agent is taken.
+    """
+    v1, v2 = mat
+    ratio = np.divide(v1, v2, out=np.where(v1 > 0, np.inf, 0.0), where=v2 > 0)
+    order = np.argsort(-ratio, kind="stable")
+    a, b = v1[order], v2[order]
+    f = np.concatenate([[0], np.cumsum(a)])
+    g = np.concatenate([[0], np.cumsum(b[::-1])])[::-1]
+    tol = 1e-12 * max(f[-1], g[0], 1)
+
+    k = int(np.argmax(f >= g - tol))
+    if k == 0:
+        opt = 0.0
+    else:
+        frac = (g[k - 1] - f[k - 1]) / (a[k - 1] + b[k - 1])
+        opt = f[k - 1] + frac * a[k - 1]
+
+    # Shortest prefix that gives agent 1 the optimum, and longest that leaves it to agent 2
+    k = int(np.argmax(f >= opt - tol))
+    s_min = k if k == 0 or f[k] - f[k - 1] <= tol else k - 1 + (opt - f[k - 1]) / a[k - 1]
+    k = len(g) - 1 - int(np.argmax(g[::-1] >= opt - tol))
+    s_max = k if k == len(a) or g[k] - g[k + 1] <= tol else k + (g[k] - opt) / b[k]
+
+    low, high = _split_at(order, s_min, len(a)), _split_at(order, s_max, len(a))
+    if (low[1] @ v2) >= (high[0] @ v1):
+        return low
+    return high
+
+def alloc_fast(mat, decimals=None):
+    """
+    Egalitarian allocation with combinatorial fast paths. Returns (allocation, path), where path
+    names the method used so the hit rate can be monitored:
+    "identical_rows" - all agents value the resources the same way, so everyone gets 1/n of each;
+    "two_agents" - the exact O(m log m) split of _two_agent_split;
+    "lp" - any other profile, solved by alloc.
+    The fast paths return the optimum that is best for the second agent when several exist,
+    so on such profiles the result can differ from the LP's arbitrary choice.
+    """
+    if sp.issparse(mat):
+        return alloc(mat, decimals), "lp"
     mat = np.array(mat, dtype=float)
     n, m = mat.shape
-    x = cp.Variable((n, m))
-    t = cp.Variable()
+    if np.any(mat < 0):
+        res, path = alloc(mat), "lp"
+    elif np.all(mat == mat[0]):
+        res, path = np.full((n, m), 1 / n), "identical_rows"
+    elif n == 2:
+        res, path = _two_agent_split(mat), "two_agents"
+    else:
+        res, path = alloc(mat), "lp"
 
-    cons = []
-    for j in range(m):
-        cons.append(cp.sum(x[:, j]) == 1)
-    cons.append(x >= 0)
-    for i in range(n):
-        cons.append(mat[i, :] @ x[i, :] >= t)
+    if decimals is not None:
+        res = np.round(res, decimals)
+    return res, path
 
-    prob = cp.Problem(cp.Maximize(t), cons)
-    prob.solve()
+def _highs_lp(mat):
+    # The max-min program with variables x (row-major, n*m) and t: every resource is fully split
+    # (rows 0..m-1), and every agent's value is at least t (rows m..m+n-1)
+    n, m = mat.shape
+    entries = np.arange(n * m)
+    supply = sp.csr_matrix((np.ones(n * m), (entries % m, entries)), shape=(m, n * m + 1))
+    values = sp.csr_matrix((np.r_[mat.ravel(), -np.ones(n)],
+                            (np.r_[entries // m, np.arange(n)], np.r_[entries, np.full(n, n * m)])),
+                           shape=(n, n * m + 1))
+    a = sp.csc_matrix(sp.vstack([supply, values]))
+    lp = highspy.HighsLp()
+    lp.num_col_ = n * m + 1
+    lp.num_row_ = m + n
+    lp.col_cost_ = np.r_[np.zeros(n * m), -1.0]
+    lp.col_lower_ = np.r_[np.zeros(n * m), -highspy.kHighsInf]
+    lp.col_upper_ = np.full(n * m + 1, highspy.kHighsInf)
+    lp.row_lower_ = np.r_[np.ones(m), np.zeros(n)]
+    lp.row_upper_ = np.r_[np.ones(m), np.full(n, highspy.kHighsInf)]
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = a.indptr
+    lp.a_matrix_.index_ = a.indices
+    lp.a_matrix_.value_ = a.data
+    return lp
 
-    res = []
-    for i in range(n):
-        row = [round(x.value[i, j], 2) for j in range(m)]
-        res.append(row)
+def alloc_sweep(mats, decimals=None):
+    """
+    Egalitarian allocations along a path of value matrices, e.g. slowly drifting valuations.
+    Returns the allocations stacked into a (k, n, m) ndarray.
+    The steps are solved by the simplex method, and every step starts from the optimal basis of the
+    previous one, so a small drift costs a few pivots instead of a cold solve. The optimum chosen
+    on a profile with several optima is therefore a vertex that depends on the path, and may differ
+    from the one alloc returns; the smallest agent value is the same.
+    """
+    solver = highspy.Highs()
+    solver.setOptionValue("output_flag", False)
+    solver.setOptionValue("solver", "simplex")
+    steps = []
+    basis = None
+    for mat in mats:
+        mat = np.array(mat, dtype=float)
+        if steps and mat.shape != steps[-1].shape:
+            raise ValueError("All value matrices must have the same shape.")
+        n, m = mat.shape
+        with instrumentation.phase("Ex3.alloc", "build", agents=n, resources=m):
+            solver.passModel(_highs_lp(mat))
+            if basis is not None:
+                solver.setBasis(basis)
+        with instrumentation.phase("Ex3.alloc", "solve", solver="HIGHS", warm=basis is not None) as fields:
+            solver.run()
+            if fields is not None:
+                fields["iterations"] = solver.getInfo().simplex_iteration_count
+        if solver.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            raise RuntimeError("No optimal solution found.")
+        basis = solver.getBasis()
+        steps.append(np.array(solver.getSolution().col_value[:n * m]).reshape(n, m))
+
+    res = np.array(steps)
+    if decimals is not None:
+        res = np.round(res, decimals)
     return res
 
 def show(res):
@@ -1,5 +1,8 @@
 import unittest
-from Ex3 import alloc, show, get_input
+from Ex3 import alloc, alloc_fast, alloc_sweep, show, get_input
+import numpy as np
+import scipy.sparse as sp
+import instrumentation
 from colorama import init, Fore, Style
 
 init(autoreset=True)
@@ -40,6 +43,77 @@ class TestAllocation(unittest.TestCase):
         self.assertAllocEqual([[50, 0, 0], [50, 50, 50]],
                               [[1.00, 0.43, 0.43], [-0.00, 0.57, 0.57]])
 
+    def test_rounding_flag(self):
+        result = alloc([[81, 19, 1], [70, 1, 29]], decimals=2)
+        self.assertIsInstance(result, np.ndarray)
+        np.testing.assert_array_equal(result, [[0.53, 1.00, 0.00], [0.47, 0.00, 1.00]])
+
+    def test_cached_problem_is_history_independent(self):
+        before = alloc([[50, 0, 0], [50, 50, 50]])
+        alloc([[0, 0, 0], [10, 5, 1]])
+        np.testing.assert_allclose(alloc([[50, 0, 0], [50, 50, 50]]), before, atol=1e-6)
+
+    def test_leximin(self):
+        np.testing.assert_allclose(alloc([[0, 0, 0], [10, 5, 1]], leximin=True),
+                                   [[0, 0, 0], [1, 1, 1]], atol=1e-4)
+        np.testing.assert_allclose(alloc([[50, 0, 0], [50, 50, 50]], leximin=True),
+                                   [[1, 0, 0], [0, 1, 1]], atol=1e-4)
+
+    def test_leximin_distinct_levels(self):
+        # Each agent only values its own resource, so every agent ends on a different level
+        mat = np.diag([1.0, 2.0, 3.0, 4.0])
+        result = alloc(mat, leximin=True)
+        np.testing.assert_allclose((mat * result).sum(axis=1), [1, 2, 3, 4], atol=1e-4)
+
+    def test_fast_paths(self):
+        result, path = alloc_fast([[81, 19, 1], [70, 1, 29]], decimals=2)
+        self.assertEqual(path, "two_agents")
+        np.testing.assert_array_equal(result, [[0.53, 1.00, 0.00], [0.47, 0.00, 1.00]])
+        result, path = alloc_fast([[1, 1], [1, 1]])
+        self.assertEqual(path, "identical_rows")
+        np.testing.assert_array_equal(result, [[0.5, 0.5], [0.5, 0.5]])
+        result, path = alloc_fast([[50, 0, 0], [50, 50, 50]])
+        np.testing.assert_allclose(result, [[1, 0, 0], [0, 1, 1]])
+        _, path = alloc_fast([[100, 0, 0], [0, 100, 0], [0, 0, 100]])
+        self.assertEqual(path, "lp")
+
+    def test_two_agents_matches_lp_value(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            mat = rng.random((2, 5)) * (rng.random((2, 5)) > 0.3)
+            fast, _ = alloc_fast(mat)
+            self.assertAlmostEqual((mat * fast).sum(axis=1).min(), (mat * alloc(mat)).sum(axis=1).min(), places=6)
+
+    def test_sparse(self):
+        result = alloc(sp.csr_matrix([[81, 19, 1, 0], [70, 1, 29, 0]]), decimals=2)
+        self.assertTrue(sp.issparse(result))
+        np.testing.assert_array_equal(result.toarray(), [[0.53, 1.00, 0.00, 0.50], [0.47, 0.00, 1.00, 0.50]])
+        mat = sp.random(30, 40, density=0.1, random_state=0, format="csr") + sp.eye(30, 40)
+        self.assertAlmostEqual(mat.multiply(alloc(mat)).sum(axis=1).min(),
+                               (mat.toarray() * alloc(mat.toarray())).sum(axis=1).min(), places=5)
+        with self.assertRaises(ValueError):
+            alloc(mat, leximin=True)
+
+    def test_sweep(self):
+        rng = np.random.default_rng(0)
+        base = rng.random((6, 5))
+        mats = [base + 0.002 * k * np.sin(np.arange(30)).reshape(6, 5) for k in range(8)]
+        events = []
+        instrumentation.add_sink(events.append)
+        try:
+            sweep = alloc_sweep(mats)
+        finally:
+            instrumentation.remove_sink(events.append)
+        self.assertEqual(sweep.shape, (8, 6, 5))
+        for mat, res in zip(mats, sweep):
+            np.testing.assert_allclose(res.sum(axis=0), 1, atol=1e-9)
+            self.assertAlmostEqual((mat * res).sum(axis=1).min(), (mat * alloc(mat)).sum(axis=1).min(), places=6)
+        iterations = [e["iterations"] for e in events if e["phase"] == "solve"]
+        # Every warm step starts from the previous optimal basis
+        self.assertLess(max(iterations[1:]), iterations[0])
+        with self.assertRaises(ValueError):
+            alloc_sweep([base, base[:3]])
+
 
 def run_tests_with_style():
     print(Fore.CYAN + Style.BRIGHT + "\n📊 Running Allocation Tests...\n" + "-" * 40)
@@ -7,9 +7,19 @@ Determines if it is possible to split the budget and the citizens' preferences s
 (c) No one pays for a topic they do not wish to support.
 """
 
+from collections import deque
+
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+import instrumentation
+
+# Largest number of topics for which the Hall condition is checked over all 2^m topic subsets
+HALL_MAX_TOPICS = 20
+
 
-def is_decomposable_flow(budget, preferences):
+def is_decomposable_flow(budget, preferences, return_flow=True, weights=None):
     """
     Determines whether the budget is decomposable given the citizens' preferences.
 
@@ -17,42 +27,592 @@ def is_decomposable_flow(budget, preferences):
     ----------
     budget : list[float]
         budget[j] is the allocated amount for topic j.
-    preferences : list[set[int]]
-        preferences[i] is the set of topics citizen i is willing to support.
+    preferences : list[set[int]] or tuple[np.ndarray, np.ndarray]
+        preferences[i] is the set of topics citizen i is willing to support, or (indptr, indices) CSR arrays.
+    return_flow : bool
+        If False and there are at most HALL_MAX_TOPICS topics, the max-flow is skipped and the
+        Hall condition is checked over all topic subsets instead (see hall_violation).
+    weights : list[float] or None
+        weights[i] is the number of citizens sharing preferences[i] (see compress_preferences); row i
+        then gets one node with capacity weights[i] * total/n, where n is the sum of the weights.
 
     Returns
     -------
     (bool, dict)
         - True and a flow dictionary if a decomposition exists.
         - False and the flow dictionary otherwise.
+        When the max-flow is skipped, the second value is a violating topic subset, or None.
     """
-    n = len(preferences)
     m = len(budget)
+    if is_csr(preferences):
+        indptr, indices = preferences_to_csr(preferences, m)
+        preferences = [indices[indptr[i]:indptr[i + 1]].tolist() for i in range(len(indptr) - 1)]
+    rows = len(preferences)
+    weights = _check_weights(weights, rows)
+    n = weights.sum()
     total = sum(budget)
     if n == 0 or m == 0 or total == 0:
         # Trivial case: zero budget, or no topics/citizens – always decomposable
-        return True, {}
+        return True, ({} if return_flow else None)
 
-    G = nx.DiGraph()
-    src, sink = 'src', 'sink'
+    if not return_flow and m <= HALL_MAX_TOPICS:
+        with instrumentation.phase("is_decomposable_flow", "hall", citizens=rows, topics=m):
+            witness = hall_violation(budget, preferences, weights)
+        return witness is None, witness
 
-    # Source -> Citizens
-    for i in range(n):
-        G.add_edge(src, f'citizen_{i}', capacity=total/n)
+    with instrumentation.phase("is_decomposable_flow", "build", citizens=rows, topics=m):
+        G = nx.DiGraph()
+        src, sink = 'src', 'sink'
 
-    # Citizens -> Topics (only if allowed)
-    for i, prefs in enumerate(preferences):
-        for j in prefs:
-            G.add_edge(f'citizen_{i}', f'topic_{j}', capacity=float('inf'))
+        # Source -> Citizens
+        for i in range(rows):
+            G.add_edge(src, f'citizen_{i}', capacity=weights[i] * total/n)
 
-    # Topics -> Sink
-    for j in range(m):
-        G.add_edge(f'topic_{j}', sink, capacity=budget[j])
+        # Citizens -> Topics (only if allowed)
+        for i, prefs in enumerate(preferences):
+            for j in prefs:
+                G.add_edge(f'citizen_{i}', f'topic_{j}', capacity=float('inf'))
+
+        # Topics -> Sink
+        for j in range(m):
+            G.add_edge(f'topic_{j}', sink, capacity=budget[j])
 
     # Compute max-flow
-    flow_value, flow_dict = nx.maximum_flow(G, src, sink)
+    with instrumentation.phase("is_decomposable_flow", "solve", edges=G.number_of_edges()):
+        flow_value, flow_dict = nx.maximum_flow(G, src, sink)
     return flow_value >= total, flow_dict
 
+def _check_weights(weights, n):
+    if weights is None:
+        return np.ones(n)
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (n,):
+        raise ValueError("Mismatch in preferences and weights sizes.")
+    if np.any(weights < 0):
+        raise ValueError("No negative weights allowed.")
+    return weights
+
+def is_csr(preferences):
+    """
+    Whether preferences is an (indptr, indices) CSR pair: a tuple of two integer ndarrays. Any other
+    sequence, including a tuple of preference sets, holds one preference set per citizen.
+    """
+    return (isinstance(preferences, tuple) and len(preferences) == 2
+            and all(isinstance(a, np.ndarray) and a.dtype.kind in "iu" for a in preferences))
+
+def preferences_to_csr(preferences, m):
+    """
+    Converts the citizens' preference sets to CSR arrays.
+
+    Parameters
+    ----------
+    preferences : list[set[int]] or tuple[np.ndarray, np.ndarray]
+        preferences[i] is the set of topics citizen i is willing to support,
+        or an (indptr, indices) pair of integer ndarrays that is already in CSR form (see is_csr).
+    m : int
+        The number of topics; topics outside range(m) are dropped, since they receive no budget.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        indptr of length n+1 and indices such that indices[indptr[i]:indptr[i+1]] are citizen i's topics.
+    """
+    if is_csr(preferences):
+        indptr, indices = (np.asarray(a, dtype=np.int64) for a in preferences)
+    else:
+        lengths = np.fromiter((len(p) for p in preferences), dtype=np.int64, count=len(preferences))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.fromiter((j for p in preferences for j in p), dtype=np.int64, count=int(indptr[-1]))
+    valid = (indices >= 0) & (indices < m)
+    if not valid.all():
+        kept = np.concatenate([[0], np.cumsum(valid)])
+        indptr, indices = kept[indptr], indices[valid]
+    return indptr, indices
+
+
+def preference_masks(indptr, indices):
+    """
+    Encodes every citizen's preference set (in CSR form, with fewer than 63 topics) as a bitmask.
+    """
+    n = len(indptr) - 1
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    masks = np.zeros(n, dtype=np.int64)
+    np.bitwise_or.at(masks, rows, np.left_shift(np.int64(1), indices))
+    return masks
+
+
+def hall_violation(budget, preferences, weights=None):
+    """
+    Checks the Hall-type condition that is equivalent to decomposability, without computing a flow.
+
+    The budget is decomposable if and only if, for every topic subset S, the budget on S is at most
+    (total/n) times the number of citizens whose preferences intersect S. Citizens are bucketed by
+    preference bitmask, and a subset-sum (zeta) transform over the 2^m masks counts, for every mask T,
+    the citizens whose preferences lie inside T; those disjoint from S lie inside the complement of S.
+    This takes O(2^m * m + n) time, so it is meant for a small number of topics m.
+
+    Parameters
+    ----------
+    budget : list[float]
+        budget[j] is the allocated amount for topic j.
+    preferences : list[set[int]] or tuple[np.ndarray, np.ndarray]
+        preferences[i] is the set of topics citizen i is willing to support, or (indptr, indices) CSR arrays.
+    weights : list[float] or None
+        weights[i] is the number of citizens sharing preferences[i]; every row counts once if omitted.
+
+    Returns
+    -------
+    set[int] or None
+        The most violated topic subset S (largest budget(S) - total/n * supporters(S)), or None if the
+        condition holds for every subset.
+    """
+    budget = np.asarray(budget, dtype=float)
+    m = len(budget)
+    if m > HALL_MAX_TOPICS:
+        raise ValueError(f"The subset enumeration supports at most {HALL_MAX_TOPICS} topics.")
+    indptr, indices = preferences_to_csr(preferences, m)
+    weights = _check_weights(weights, len(indptr) - 1)
+    n = weights.sum()
+    total = budget.sum()
+    if n == 0 or m == 0 or total == 0:
+        return None
+
+    inside = np.bincount(preference_masks(indptr, indices), weights=weights, minlength=1 << m)
+    subset_budget = np.zeros(1, dtype=float)
+    for j in range(m):
+        # Zeta transform along bit j: add the count of every mask without j to the same mask with j
+        view = inside.reshape(-1, 2, 1 << j)
+        view[:, 1, :] += view[:, 0, :]
+        subset_budget = np.concatenate([subset_budget, subset_budget + budget[j]])
+    full = (1 << m) - 1
+    supporters = n - inside[full ^ np.arange(1 << m)]
+    excess = subset_budget - (total / n) * supporters
+    worst = int(np.argmax(excess))
+    if excess[worst] <= 1e-9 * max(total, 1.0):
+        return None
+    return {j for j in range(m) if worst >> j & 1}
+
+
+def preference_classes(indptr, indices, m):
+    """
+    Groups citizens with identical preference sets.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray, np.ndarray, np.ndarray)
+        class_of[i] is the class of citizen i, counts[c] the number of citizens in class c,
+        and (class_indptr, class_indices) the topics of each class in CSR form.
+    """
+    n = len(indptr) - 1
+    if m <= 62:
+        keys, class_of, counts = np.unique(preference_masks(indptr, indices), return_inverse=True, return_counts=True)
+        members = sp.csr_matrix(((keys[:, None] >> np.arange(m)) & 1).astype(bool))
+    else:
+        # Too many topics for a bitmask: use the bytes of each sorted, deduplicated row as the key
+        rows = np.repeat(np.arange(n), np.diff(indptr))
+        member_matrix = sp.csr_matrix((np.ones(len(indices), dtype=bool), (rows, indices)), shape=(n, m))
+        member_matrix.sort_indices()
+        keys = {}
+        class_of = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            row = member_matrix.indices[member_matrix.indptr[i]:member_matrix.indptr[i + 1]].tobytes()
+            class_of[i] = keys.setdefault(row, len(keys))
+        counts = np.bincount(class_of, minlength=len(keys))
+        members = member_matrix[np.unique(class_of, return_index=True)[1]]
+    members.sort_indices()
+    return class_of.ravel(), counts, members.indptr.astype(np.int64), members.indices.astype(np.int64)
+
+
+def compress_preferences(preferences, m):
+    """
+    Deduplicates the citizens' preference sets into weighted classes, so that the decomposability checks
+    run on one row per distinct preference set instead of one per citizen.
+
+    Returns
+    -------
+    (tuple[np.ndarray, np.ndarray], np.ndarray, np.ndarray)
+        The (indptr, indices) preferences of the classes, their sizes (to pass as weights to
+        is_decomposable_flow, is_decomposable_sparse or hall_violation), and class_of[i], the class of
+        citizen i (to pass to expand_flow).
+    """
+    indptr, indices = preferences_to_csr(preferences, m)
+    class_of, counts, class_indptr, class_indices = preference_classes(indptr, indices, m)
+    return (class_indptr, class_indices), counts, class_of
+
+
+def expand_flow(flow, class_of):
+    """
+    Expands a flow computed on compressed preferences back to one row per citizen; every citizen
+    pays an equal share of its class's flow.
+
+    Parameters
+    ----------
+    flow : dict or scipy.sparse matrix
+        The flow returned by is_decomposable_flow or is_decomposable_sparse for the classes.
+    class_of : np.ndarray
+        class_of[i] is the class of citizen i, as returned by compress_preferences.
+
+    Returns
+    -------
+    dict or scipy.sparse.csr_matrix
+        The flow in the same format, with a row (or citizen node) per citizen.
+    """
+    class_of = np.asarray(class_of, dtype=np.int64)
+    counts = np.bincount(class_of)
+    if sp.issparse(flow):
+        return sp.csr_matrix(sp.diags(1.0 / counts[class_of]) @ sp.csr_matrix(flow)[class_of])
+    expanded = {node: dict(edges) for node, edges in flow.items() if not node.startswith('citizen_')}
+    if not flow:
+        return expanded
+    expanded['src'] = {}
+    for i, c in enumerate(class_of.tolist()):
+        expanded['src'][f'citizen_{i}'] = flow['src'][f'citizen_{c}'] / counts[c]
+        expanded[f'citizen_{i}'] = {topic: amount / counts[c] for topic, amount in flow[f'citizen_{c}'].items()}
+    return expanded
+
+
+class _FlowNetwork:
+    """
+    Integer-indexed residual network with float capacities, solved with Dinic's algorithm.
+
+    Edge k is stored at position 2k and its reverse at 2k+1, so the flow on edge k is the residual
+    capacity of its reverse. The network is kept between calls: capacities can be changed and the
+    existing flow is repaired and re-augmented instead of being recomputed from scratch.
+    """
+
+    def __init__(self, num_nodes, source, sink, tol):
+        self.graph = [[] for _ in range(num_nodes)]
+        self.head = []
+        self.cap = []
+        self.capacity = []
+        self.source = source
+        self.sink = sink
+        self.tol = tol
+        self.value = 0.0
+
+    def add_node(self):
+        self.graph.append([])
+        return len(self.graph) - 1
+
+    def add_edge(self, u, v, capacity):
+        self.graph[u].append(len(self.head))
+        self.head.append(v)
+        self.cap.append(capacity)
+        self.graph[v].append(len(self.head))
+        self.head.append(u)
+        self.cap.append(0.0)
+        self.capacity.append(capacity)
+        return len(self.head) // 2 - 1
+
+    def flow(self, k):
+        return self.cap[2 * k + 1]
+
+    def set_capacity(self, k, capacity):
+        """
+        Changes the capacity of edge k. If the new capacity is below the current flow, the surplus is
+        cancelled along residual paths back to the source and from the sink, keeping a valid flow.
+        If rounding leaves too little flow to cancel, the flow is reset to zero instead.
+        Call augment() afterwards to restore a maximum flow.
+        """
+        self.capacity[k] = capacity
+        f = self.flow(k)
+        if capacity >= f:
+            self.cap[2 * k] = capacity - f
+            return
+        surplus = f - capacity
+        self.cap[2 * k] = 0.0
+        self.cap[2 * k + 1] = capacity
+        u, v = self.head[2 * k + 1], self.head[2 * k]
+        if (u != self.source and not self._push(u, self.source, surplus)) or \
+                (v != self.sink and not self._push(self.sink, v, surplus)):
+            self.reset()
+            return
+        self.value -= surplus
+
+    def reset(self):
+        """Drops the current flow, leaving every edge at its full capacity."""
+        for k, capacity in enumerate(self.capacity):
+            self.cap[2 * k] = capacity
+            self.cap[2 * k + 1] = 0.0
+        self.value = 0.0
+
+    def _push(self, start, end, amount):
+        # Moves the given amount along shortest residual paths from start to end
+        while amount > self.tol:
+            parent = {start: None}
+            queue = deque([start])
+            while queue and end not in parent:
+                u = queue.popleft()
+                for e in self.graph[u]:
+                    if self.cap[e] > self.tol and self.head[e] not in parent:
+                        parent[self.head[e]] = e
+                        queue.append(self.head[e])
+            if end not in parent:
+                return False
+            path = []
+            node = end
+            while parent[node] is not None:
+                path.append(parent[node])
+                node = self.head[parent[node] ^ 1]
+            f = min([amount] + [self.cap[e] for e in path])
+            for e in path:
+                self.cap[e] -= f
+                self.cap[e ^ 1] += f
+            amount -= f
+        return True
+
+    def augment(self):
+        """Augments the current flow to a maximum flow (Dinic's algorithm) and returns its value."""
+        graph, head, cap, tol = self.graph, self.head, self.cap, self.tol
+        source, sink = self.source, self.sink
+        num_nodes = len(graph)
+        while True:
+            level = [-1] * num_nodes
+            level[source] = 0
+            queue = deque([source])
+            while queue:
+                u = queue.popleft()
+                for e in graph[u]:
+                    if cap[e] > tol and level[head[e]] < 0:
+                        level[head[e]] = level[u] + 1
+                        queue.append(head[e])
+            if level[sink] < 0:
+                return self.value
+
+            # Find a blocking flow with an iterative depth-first search
+            it = [0] * num_nodes
+            path = []
+            u = source
+            while True:
+                if u == sink:
+                    f = min(cap[e] for e in path)
+                    for e in path:
+                        cap[e] -= f
+                        cap[e ^ 1] += f
+                    self.value += f
+                    path = []
+                    u = source
+                    continue
+                edges_u = graph[u]
+                while it[u] < len(edges_u):
+                    e = edges_u[it[u]]
+                    if cap[e] > tol and level[head[e]] == level[u] + 1:
+                        break
+                    it[u] += 1
+                if it[u] < len(edges_u):
+                    e = edges_u[it[u]]
+                    path.append(e)
+                    u = head[e]
+                elif path:
+                    level[u] = -1
+                    e = path.pop()
+                    u = head[e ^ 1]
+                    it[u] += 1
+                else:
+                    break
+
+
+def is_decomposable_sparse(budget, preferences, weights=None):
+    """
+    Determines whether the budget is decomposable, using an integer-indexed max-flow engine.
+
+    Citizens with identical preference sets are merged into one class whose source capacity is
+    (class size) * total/n, so the flow network has one node per distinct preference set instead of
+    one per citizen. Each citizen then pays an equal share of its class's flow.
+
+    Parameters
+    ----------
+    budget : list[float]
+        budget[j] is the allocated amount for topic j.
+    preferences : list[set[int]] or tuple[np.ndarray, np.ndarray]
+        preferences[i] is the set of topics citizen i is willing to support, or (indptr, indices) CSR arrays.
+    weights : list[float] or None
+        weights[i] is the number of citizens sharing preferences[i] (see compress_preferences); the
+        class sizes are then sums of weights. Every row counts once if omitted.
+
+    Returns
+    -------
+    (bool, scipy.sparse.csr_matrix)
+        Whether a decomposition exists, and the matrix of how much each row of preferences pays for each
+        topic in a maximum flow (use expand_flow to get one row per citizen from weighted rows).
+    """
+    budget = np.asarray(budget, dtype=float)
+    m = len(budget)
+    indptr, indices = preferences_to_csr(preferences, m)
+    rows = len(indptr) - 1
+    weights = _check_weights(weights, rows)
+    n = weights.sum()
+    total = budget.sum()
+    if n == 0 or m == 0 or total == 0:
+        # Trivial case: zero budget, or no topics/citizens – always decomposable
+        return True, sp.csr_matrix((rows, m))
+
+    with instrumentation.phase("is_decomposable_sparse", "build", citizens=rows, topics=m) as fields:
+        class_of, _, class_indptr, class_topics = preference_classes(indptr, indices, m)
+        counts = np.bincount(class_of, weights=weights)
+        k = len(counts)
+        network = _FlowNetwork(k + m + 2, 0, k + m + 1, 1e-12 * max(total, 1.0))
+        share = total / n
+        for c in range(k):
+            network.add_edge(network.source, 1 + c, counts[c] * share)
+        class_rows = np.repeat(np.arange(k), np.diff(class_indptr))
+        topic_edges = [network.add_edge(1 + c, 1 + k + j, float("inf"))
+                       for c, j in zip(class_rows.tolist(), class_topics.tolist())]
+        for j in range(m):
+            network.add_edge(1 + k + j, network.sink, budget[j])
+        if fields is not None:
+            fields["classes"] = k
+    with instrumentation.phase("is_decomposable_sparse", "solve", edges=len(topic_edges) + k + m):
+        flow_value = network.augment()
+
+    with instrumentation.phase("is_decomposable_sparse", "extract"):
+        class_flow = sp.csr_matrix(([network.flow(e) for e in topic_edges], class_topics, class_indptr),
+                                   shape=(k, m))
+        row_share = np.divide(weights, counts[class_of], out=np.zeros(rows), where=counts[class_of] > 0)
+        flow = sp.diags(row_share) @ class_flow[class_of]
+    return flow_value >= total - network.tol * (k + m), sp.csr_matrix(flow)
+
+class DecompositionChecker:
+    """
+    Stateful decomposability checker for interactive what-if sessions.
+
+    Keeps the residual network of the class-compressed flow problem (see is_decomposable_sparse)
+    between edits. Changing a topic's amount or a citizen's preference set only changes a few
+    capacities (and every citizen's share of the total); the current flow is repaired where a
+    capacity drops below it and then re-augmented, instead of recomputing the max-flow from scratch.
+
+    Parameters
+    ----------
+    budget : list[float]
+        budget[j] is the allocated amount for topic j.
+    preferences : list[set[int]] or tuple[np.ndarray, np.ndarray]
+        preferences[i] is the set of topics citizen i is willing to support, or (indptr, indices) CSR arrays.
+    """
+
+    def __init__(self, budget, preferences):
+        self.budget = [float(b) for b in budget]
+        m = len(self.budget)
+        indptr, indices = preferences_to_csr(preferences, m)
+        self.n = len(indptr) - 1
+        self._network = _FlowNetwork(m + 2, 0, 1, 1e-12)
+        self._sink_edges = [self._network.add_edge(2 + j, self._network.sink, b) for j, b in enumerate(self.budget)]
+        self._class_ids = {}
+        self._class_topics = []
+        self._class_counts = []
+        self._class_nodes = []
+        self._source_edges = []
+        self._topic_edges = []
+        self._class_of = [self._class_id(frozenset(indices[indptr[i]:indptr[i + 1]].tolist()))
+                          for i in range(self.n)]
+        for c in self._class_of:
+            self._class_counts[c] += 1
+        self._update_shares()
+        self._network.augment()
+
+    @property
+    def total(self):
+        return sum(self.budget)
+
+    def _class_id(self, topics):
+        if topics not in self._class_ids:
+            network = self._network
+            node = network.add_node()
+            self._class_ids[topics] = len(self._class_topics)
+            self._class_topics.append(sorted(topics))
+            self._class_counts.append(0)
+            self._class_nodes.append(node)
+            self._source_edges.append(network.add_edge(network.source, node, 0.0))
+            self._topic_edges.append([network.add_edge(node, 2 + j, float("inf")) for j in sorted(topics)])
+        return self._class_ids[topics]
+
+    def _update_shares(self, classes=None):
+        # Every citizen pays total/n, so a class's source capacity is its size times that share
+        share = self.total / self.n if self.n else 0.0
+        self._network.tol = 1e-12 * max(self.total, 1.0)
+        for c in range(len(self._class_counts)) if classes is None else classes:
+            self._network.set_capacity(self._source_edges[c], self._class_counts[c] * share)
+
+    def is_decomposable(self):
+        """Returns whether the current budget is decomposable."""
+        if self.n == 0 or not self.budget or self.total == 0:
+            return True
+        return self._network.value >= self.total - self._network.tol * len(self._network.graph)
+
+    def set_budget(self, j, amount):
+        """Changes the amount allocated to topic j and returns whether the budget is decomposable."""
+        self.budget[j] = float(amount)
+        self._network.set_capacity(self._sink_edges[j], self.budget[j])
+        self._update_shares()
+        self._network.augment()
+        return self.is_decomposable()
+
+    def set_preferences(self, i, topics):
+        """Replaces citizen i's preference set and returns whether the budget is decomposable."""
+        old = self._class_of[i]
+        new = self._class_id(frozenset(j for j in topics if 0 <= j < len(self.budget)))
+        if new != old:
+            self._class_counts[old] -= 1
+            self._class_counts[new] += 1
+            self._class_of[i] = new
+            self._update_shares([old, new])
+            self._network.augment()
+        return self.is_decomposable()
+
+    def add_preference(self, i, j):
+        """Lets citizen i support topic j and returns whether the budget is decomposable."""
+        return self.set_preferences(i, set(self._class_topics[self._class_of[i]]) | {j})
+
+    def remove_preference(self, i, j):
+        """Stops citizen i from supporting topic j and returns whether the budget is decomposable."""
+        return self.set_preferences(i, set(self._class_topics[self._class_of[i]]) - {j})
+
+    def flow(self):
+        """Returns the current (n, m) matrix of how much each citizen pays for each topic."""
+        m = len(self.budget)
+        counts = np.asarray(self._class_counts, dtype=float)
+        rows, cols, vals = [], [], []
+        for c, (topics, edges) in enumerate(zip(self._class_topics, self._topic_edges)):
+            if counts[c]:
+                rows += [c] * len(topics)
+                cols += topics
+                vals += [self._network.flow(e) / counts[c] for e in edges]
+        class_flow = sp.csr_matrix((vals, (rows, cols)), shape=(len(counts), m))
+        return sp.csr_matrix(class_flow[np.asarray(self._class_of, dtype=np.int64)])
+
+    def max_feasible_amount(self, j, tol=1e-9):
+        """
+        Finds the largest amount for topic j that keeps the budget decomposable, by a binary search over
+        incremental re-checks. The feasible amounts form an interval that contains the current one, which
+        must be decomposable; the Hall condition for S = {j} bounds it from above. The budget is restored afterwards.
+
+        Returns
+        -------
+        float
+            The largest feasible amount (up to tol relative precision), or inf if every citizen supports topic j.
+        """
+        if not self.is_decomposable():
+            raise ValueError("The current budget is not decomposable.")
+        supporters = sum(count for topics, count in zip(self._class_topics, self._class_counts) if j in topics)
+        if supporters == self.n:
+            return float("inf")
+        original = self.budget[j]
+        # budget[j] <= (total/n) * supporters(j), where total includes budget[j] itself
+        lo = original
+        hi = max((self.total - original) * supporters / (self.n - supporters), original)
+        try:
+            if self.set_budget(j, hi):
+                return hi
+            while hi - lo > tol * max(hi, 1.0):
+                mid = (lo + hi) / 2
+                if self.set_budget(j, mid):
+                    lo = mid
+                else:
+                    hi = mid
+            return lo
+        finally:
+            self.set_budget(j, original)
+
+
 ########################
 #        TESTS         #
 ########################
@@ -0,0 +1,25 @@
+"""
+Helpers shared by the allocation rules that split divisible items among agents (Ex3.alloc and the
+Fisher market solvers of assigment3_Ex5).
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def spread_unvalued(allocation, valued):
+    """
+    Splits the items with valued[j] False evenly among the agents. Nobody values them, so the split
+    cannot change any agent's value; in a Fisher market these are the unsold items, priced 0.
+    allocation may be a dense array (updated in place) or a scipy.sparse matrix (a new csr matrix is returned).
+    """
+    n, m = allocation.shape
+    cols = np.flatnonzero(~np.asarray(valued))
+    if len(cols) == 0:
+        return allocation
+    if not sp.issparse(allocation):
+        allocation[:, cols] = 1 / n
+        return allocation
+    even = sp.csr_matrix((np.full(n * len(cols), 1 / n), (np.repeat(np.arange(n), len(cols)), np.tile(cols, n))),
+                         shape=(n, m))
+    return sp.csr_matrix(allocation + even)
@@ -1,52 +1,313 @@
 import numpy as np
 import cvxpy as cp
+import scipy.sparse as sp
 
-def equilibrium(vals, money):
+import instrumentation
+from allocations import spread_unvalued
+
+class EquilibriumSolver:
+    """
+    Eisenberg-Gale program for one (n_agents, n_items) shape, compiled once and re-solved.
+    Valuations and budgets are cp.Parameters, so later solves skip canonicalization.
+    """
+
+    def __init__(self, n_agents, n_items):
+        self.shape = (n_agents, n_items)
+        self.vals = cp.Parameter((n_agents, n_items), nonneg=True)
+        self.budgets = cp.Parameter(n_agents, nonneg=True)
+        self.alloc = cp.Variable((n_agents, n_items), nonneg=True)
+        # The utilities are a separate variable so that budgets * log(utility) stays DPP
+        self.utility = cp.Variable(n_agents)
+        # The duals of the per-item supply constraints are the equilibrium prices
+        self.supply = cp.sum(self.alloc, axis=0) == 1
+        cons = [
+            self.utility <= cp.sum(cp.multiply(self.vals, self.alloc), axis=1),
+            self.supply,
+        ]
+        self.problem = cp.Problem(cp.Maximize(self.budgets @ cp.log(self.utility)), cons)
+
+    def solve(self, vals, money, **solver_args):
+        vals_arr, budgets_arr = _check_market(vals, money)
+        if vals_arr.shape != self.shape:
+            raise ValueError("Market shape does not match the compiled problem.")
+        with instrumentation.phase("equilibrium", "build", agents=self.shape[0], items=self.shape[1]):
+            self.vals.value = vals_arr
+            self.budgets.value = budgets_arr
+        instrumentation.solve("equilibrium", self.problem, warm_start=True, **solver_args)
+
+        if self.problem.status not in ["optimal", "optimal_inaccurate"]:
+            raise RuntimeError("No optimal solution found.")
+
+        with instrumentation.phase("equilibrium", "extract"):
+            final = self.alloc.value
+            if self.supply.dual_value is None:
+                prices = _recover_prices(final, vals_arr, budgets_arr)
+            else:
+                prices = np.maximum(self.supply.dual_value, 0).tolist()
+        return {"allocation": final, "prices": prices}
+
+
+_solvers = {}
+
+# Rounds of proportional response between two duality-gap checks (the gap is also checked after the
+# first round, which is often enough from a warm start)
+_GAP_CHECK_EVERY = 10
+
+# Weight of the proportional split mixed into a warm-start allocation
+_WARM_START_MIX = 1e-3
+
+
+def get_solver(n_agents, n_items):
+    """Returns the cached EquilibriumSolver for this market shape, compiling it on first use."""
+    key = (n_agents, n_items)
+    if key not in _solvers:
+        _solvers[key] = EquilibriumSolver(n_agents, n_items)
+    return _solvers[key]
+
+
+def _check_market(vals, money):
     if len(vals) != len(money):
         raise ValueError("Mismatch in agents and budget sizes.")
-    for row in vals:
-        if any(val < 0 for val in row):
-            raise ValueError("No negative preferences allowed.")
-
-    n_agents = len(vals)
-    n_items = len(vals[0])
     vals_arr = np.array(vals, dtype=float)
-    budgets_arr = np.array(money, dtype=float)
+    if np.any(vals_arr < 0):
+        raise ValueError("No negative preferences allowed.")
+    return vals_arr, np.array(money, dtype=float)
 
-    alloc = cp.Variable((n_agents, n_items), nonneg=True)
-    logs = []
-    for a_idx in range(n_agents):
-        expr = 0
-        for i_idx in range(n_items):
-            expr += alloc[a_idx, i_idx] * vals_arr[a_idx, i_idx]
-        logs.append(budgets_arr[a_idx] * cp.log(expr))
 
-    cons = []
-    for i_idx in range(n_items):
-        cons.append(cp.sum(alloc[:, i_idx]) == 1)
+def _recover_prices(final, vals_arr, budgets_arr):
+    """
+    Primal price recovery: p_j = max_i B_i * v_ij / u_i, the price at which item j is a best buy
+    for the agents that get it. One vectorized pass over the allocation.
+    """
+    utilities = np.sum(final * vals_arr, axis=1)
+    ratio = np.divide(budgets_arr, utilities, out=np.zeros(len(utilities)), where=utilities > 0)
+    return (vals_arr * ratio[:, None]).max(axis=0, initial=0.0).tolist()
 
-    prob = cp.Problem(cp.Maximize(cp.sum(logs)), cons)
-    prob.solve()
 
-    if prob.status not in ["optimal", "optimal_inaccurate"]:
+def _equilibrium_sparse(vals, money, **solver_args):
+    """
+    Eisenberg-Gale program over a scipy.sparse valuation matrix, with one allocation variable per
+    nonzero valuation. Items that nobody values are priced 0 and split evenly.
+    """
+    if vals.shape[0] != len(money):
+        raise ValueError("Mismatch in agents and budget sizes.")
+    mat = sp.csr_matrix(vals, dtype=float)
+    mat.eliminate_zeros()
+    if np.any(mat.data < 0):
+        raise ValueError("No negative preferences allowed.")
+    if np.any(np.diff(mat.indptr) == 0):
+        raise ValueError("Every agent must value at least one item.")
+    budgets = np.array(money, dtype=float)
+    n_agents, n_items = mat.shape
+    entries = np.arange(mat.nnz)
+    rows = np.repeat(np.arange(n_agents), np.diff(mat.indptr))
+    values = sp.csr_matrix((mat.data, (rows, entries)), shape=(n_agents, mat.nnz))
+    owners = sp.csr_matrix((np.ones(mat.nnz), (mat.indices, entries)), shape=(n_items, mat.nnz))
+    valued = np.diff(owners.indptr) > 0
+
+    alloc = cp.Variable(mat.nnz, nonneg=True)
+    utility = cp.Variable(n_agents)
+    supply = owners[valued] @ alloc == 1
+    problem = cp.Problem(cp.Maximize(budgets @ cp.log(utility)), [utility <= values @ alloc, supply])
+    instrumentation.solve("equilibrium", problem, **solver_args)
+    if problem.status not in ["optimal", "optimal_inaccurate"]:
         raise RuntimeError("No optimal solution found.")
 
-    final = alloc.value
-    prices = []
-    eps = 1e-6
-    for i_idx in range(n_items):
-        p_i = 0
-        for a_idx in range(n_agents):
-            if final[a_idx, i_idx] > eps:
-                s = 0
-                for i2 in range(n_items):
-                    s += final[a_idx, i2] * vals_arr[a_idx, i2]
-                if s > 0:
-                    p_i = (budgets_arr[a_idx] * vals_arr[a_idx, i_idx]) / s
-                    break
-        prices.append(p_i)
-
-    return {"allocation": final, "prices": prices}
+    prices = np.zeros(n_items)
+    prices[valued] = np.maximum(supply.dual_value, 0)
+    allocation = spread_unvalued(sp.csr_matrix((alloc.value, mat.indices, mat.indptr), shape=(n_agents, n_items)),
+                                 valued)
+    return {"allocation": allocation, "prices": prices.tolist()}
+
+
+def equilibrium(vals, money, method="cvxpy", **options):
+    """
+    Computes the Fisher market equilibrium. method="cvxpy" solves the Eisenberg-Gale program;
+    method="proportional_response" runs equilibrium_proportional_response with the given options.
+    Both accept a scipy.sparse valuation matrix, for which only the nonzero valuations get allocation
+    variables and the allocation is returned as a sparse matrix.
+    """
+    if method == "proportional_response":
+        return equilibrium_proportional_response(vals, money, **options)
+    if method != "cvxpy":
+        raise ValueError(f"Unknown method: {method}")
+    if sp.issparse(vals):
+        return _equilibrium_sparse(vals, money, **options)
+    vals_arr, budgets_arr = _check_market(vals, money)
+    return get_solver(*vals_arr.shape).solve(vals_arr, budgets_arr, **options)
+
+
+def equilibrium_batch(instances, **solver_args):
+    """
+    Solves many markets given as (vals, money) pairs. Markets of the same shape share one
+    compiled problem, and each solve is warm-started from the previous one of that shape.
+    """
+    results = []
+    for vals, money in instances:
+        if sp.issparse(vals):
+            results.append(_equilibrium_sparse(vals, money, **solver_args))
+            continue
+        vals_arr, budgets_arr = _check_market(vals, money)
+        results.append(get_solver(*vals_arr.shape).solve(vals_arr, budgets_arr, **solver_args))
+    return results
+
+
+def equilibrium_sweep(vals, budget_path, method="proportional_response", **options):
+    """
+    Follows the equilibrium of the market with valuations vals along a path of budget vectors,
+    e.g. for a sensitivity analysis. With method="proportional_response" every step starts from the
+    allocation of the previous one, so a smooth path costs a few rounds per step instead of a cold
+    run; with method="cvxpy" every step re-solves the one compiled problem of this shape.
+
+    Returns a dict with the stacked "allocation" (k, n_agents, n_items) (a list of sparse matrices
+    for sparse valuations) and "prices" (k, n_items), plus the "iterations" of every step for
+    proportional response.
+    """
+    if method not in ("cvxpy", "proportional_response"):
+        raise ValueError(f"Unknown method: {method}")
+    steps = []
+    previous = None
+    for money in budget_path:
+        if method == "cvxpy":
+            step = equilibrium(vals, money, **options)
+        else:
+            step = equilibrium_proportional_response(vals, money, warm_start=previous, **options)
+            previous = step["allocation"]
+        steps.append(step)
+
+    allocations = [step["allocation"] for step in steps]
+    result = {
+        "allocation": allocations if sp.issparse(vals) else np.array(allocations).reshape(len(steps), *np.shape(vals)),
+        "prices": np.array([step["prices"] for step in steps]).reshape(len(steps), np.shape(vals)[1]),
+    }
+    if method == "proportional_response":
+        result["iterations"] = np.array([step["iterations"] for step in steps], dtype=int)
+    return result
+
+
+def equilibrium_proportional_response(vals, money, tol=1e-3, max_iter=10000, certificate=False, warm_start=None):
+    """
+    Solver-free Fisher market equilibrium by proportional-response dynamics.
+
+    Every agent bids its budget on the items in proportion to the utility each item gave it in the
+    previous round; prices are the sums of the bids and allocations are bid shares. Each round is a
+    few vectorized passes over the valuations, which may be a dense array or a scipy.sparse matrix
+    (only the nonzero valuations are touched, and the allocation is returned as a sparse matrix).
+
+    Convergence is measured by the duality gap of the Eisenberg-Gale program: the dual value at the
+    current prices minus the primal value at the current allocation, which bounds the suboptimality.
+    Iterates until the gap is at most tol * sum(money), checked every few rounds, or max_iter rounds.
+    With certificate=True the final gap is returned as "duality_gap". Items that nobody values are
+    priced 0 and split evenly. The number of rounds is returned as "iterations".
+
+    warm_start may be the allocation of an earlier call on a market with the same valuations (for
+    example with slightly different budgets); the dynamics then start from it instead of from the
+    proportional split, and a nearby equilibrium is reached in a few rounds.
+    """
+    if len(money) != (vals.shape[0] if sp.issparse(vals) else len(vals)):
+        raise ValueError("Mismatch in agents and budget sizes.")
+    if max_iter < 1:
+        raise ValueError("max_iter must be at least 1.")
+    budgets = np.array(money, dtype=float)
+    if sp.issparse(vals):
+        mat = sp.csr_matrix(vals, dtype=float)
+        mat.eliminate_zeros()
+        if np.any(mat.data < 0):
+            raise ValueError("No negative preferences allowed.")
+        n_agents, n_items = mat.shape
+        v = mat.data
+        rows = np.repeat(np.arange(n_agents), np.diff(mat.indptr))
+        nonempty = np.diff(mat.indptr) > 0
+
+        def col_sum(data):
+            return np.bincount(mat.indices, weights=data, minlength=n_items)
+
+        def row_sum(data):
+            return np.bincount(rows, weights=data, minlength=n_agents)
+
+        def row_max(data):
+            best = np.zeros(n_agents)
+            np.maximum.at(best, rows, data)
+            return best
+
+        def per_agent(vec):
+            return vec[rows]
+
+        def per_item(vec):
+            return vec[mat.indices]
+    else:
+        v = np.array(vals, dtype=float)
+        if np.any(v < 0):
+            raise ValueError("No negative preferences allowed.")
+        n_agents, n_items = v.shape
+        nonempty = np.any(v > 0, axis=1)
+
+        def col_sum(data):
+            return data.sum(axis=0)
+
+        def row_sum(data):
+            return data.sum(axis=1)
+
+        def row_max(data):
+            return data.max(axis=1)
+
+        def per_agent(vec):
+            return vec[:, None]
+
+        def per_item(vec):
+            return vec[None, :]
+
+    if not np.all(nonempty):
+        raise ValueError("Every agent must value at least one item.")
+    spending = budgets > 0
+
+    def inverse(vec):
+        return np.divide(1.0, vec, out=np.zeros(len(vec)), where=vec > 0)
+
+    def duality_gap(prices, share):
+        # Dual of Eisenberg-Gale: sum(p) + sum_i B_i*(log(B_i * max_j v_ij/p_j) - 1)
+        utility = row_sum(v * share)
+        primal = np.sum(budgets[spending] * np.log(utility[spending]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            best = row_max(np.where(v > 0, v / per_item(prices), 0.0))
+        dual = prices.sum() + np.sum(budgets[spending] * (np.log(budgets[spending] * best[spending]) - 1))
+        return dual - primal
+
+    # Start by splitting every budget in proportion to the valuations
+    bids = v * per_agent(budgets * inverse(row_sum(v)))
+    prices = col_sum(bids)
+    share = bids * per_item(inverse(prices))
+    if warm_start is not None:
+        if np.shape(warm_start) != (n_agents, n_items):
+            raise ValueError("warm_start does not match the market shape.")
+        if sp.issparse(vals):
+            previous = np.asarray(sp.csr_matrix(warm_start)[rows, mat.indices]).ravel()
+        else:
+            previous = np.asarray(warm_start, dtype=float)
+        # A little of the proportional split keeps every share positive: the multiplicative updates
+        # could never move an item back to an agent whose share had reached zero
+        share = (1 - _WARM_START_MIX) * previous + _WARM_START_MIX * share
+    with instrumentation.phase("equilibrium", "iterate", agents=n_agents, items=n_items) as fields:
+        for it in range(1, max_iter + 1):
+            gain = v * share
+            bids = gain * per_agent(budgets * inverse(row_sum(gain)))
+            prices = col_sum(bids)
+            share = bids * per_item(inverse(prices))
+            if (it % _GAP_CHECK_EVERY == 0 or it == 1) and duality_gap(prices, share) <= tol * budgets.sum():
+                break
+        if fields is not None:
+            fields["iterations"] = it
+
+    if sp.issparse(vals):
+        allocation = sp.csr_matrix((share, mat.indices, mat.indptr), shape=(n_agents, n_items))
+    else:
+        allocation = share
+    allocation = spread_unvalued(allocation, prices > 0)
+    result = {"allocation": allocation, "prices": prices.tolist(), "iterations": it}
+    if certificate:
+        result["duality_gap"] = duality_gap(prices, share)
+    return result
+
 
 def print_results_in_table(result):
     allocation = result["allocation"]
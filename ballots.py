@@ -0,0 +1,58 @@
+"""
+Deduplication of ballots for the median budget rules (EX12_5A / EX12_5B).
+Real ballot sets repeat the same vectors many times; grouping them leaves one row per distinct ballot
+with its multiplicity, and the rules' weighted paths compute the same medians from those rows.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+def _hash_multipliers(m: int) -> np.ndarray:
+    # Fixed odd 64-bit multipliers, one per section
+    return np.random.default_rng(0x5EC7).integers(1, 1 << 63, m, dtype=np.uint64) | np.uint64(1)
+
+
+def ballot_classes(citizen_votes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Deduplicates identical ballots, so the median rules can run on one row per distinct ballot with
+    its multiplicity as weight.
+
+    Args:
+        citizen_votes (np.ndarray): Array of shape (n, m), where row i is citizen i's ballot.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The distinct ballots (k, m), the number of citizens
+            casting each one (k,), and class_of (n,), the index of citizen i's ballot among the distinct ones.
+    """
+    # Adding 0.0 turns -0.0 into 0.0, so equal votes also have equal bits
+    votes = np.ascontiguousarray(citizen_votes, dtype=np.float64) + 0.0
+    # Rows are grouped by a 64-bit multiplicative hash of their bits, which sorts much faster than the rows
+    with np.errstate(over="ignore"):
+        keys = (votes.view(np.uint64) * _hash_multipliers(votes.shape[1])).sum(axis=1, dtype=np.uint64)
+    _, first, class_of, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    class_of = class_of.ravel()
+    if not np.array_equal(votes[first][class_of], votes):
+        # A hash collision: group by the rows' bytes instead
+        keys = votes.view(np.dtype((np.void, votes.dtype.itemsize * votes.shape[1]))).ravel()
+        _, first, class_of, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+        class_of = class_of.ravel()
+    return votes[first], counts, class_of
+
+
+def weighted_sections(values: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts the votes of every section of (k, m) weighted ballots, as expected by weighted_order_statistics.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The sorted votes (m, k) and the weight (m, k) of each vote.
+    """
+    weights = np.asarray(weights)
+    if weights.shape != (values.shape[0],):
+        raise ValueError("Mismatch in ballots and weights sizes.")
+    if np.any(weights < 0) or np.any(weights != np.round(weights)):
+        raise ValueError("Weights must be non-negative integers.")
+    sections = np.ascontiguousarray(np.asarray(values, dtype=float).T)
+    order = np.argsort(sections, axis=1)
+    return np.take_along_axis(sections, order, axis=1), weights.astype(np.int64)[order]
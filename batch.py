@@ -0,0 +1,76 @@
+"""
+Batch evaluation of the allocation rules over many independent instances on a process pool.
+Each worker imports its rule once, so per-shape caches such as the compiled cvxpy problems of
+Ex3 and assigment3_Ex5 live for the whole batch, and results stream back as they finish.
+"""
+
+import importlib
+import multiprocessing
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+# Rule name -> "module:function"; every instance is a tuple of positional arguments for the function
+RULES = {
+    "egalitarian": "Ex3:alloc",
+    "equilibrium": "assigment3_Ex5:equilibrium",
+    "budget": "EX12_5A:compute_budget",
+    "decomposable": "Q11:is_decomposable_flow",
+}
+
+
+class BatchResult(NamedTuple):
+    """The outcome of one instance: its position in the input and either its value or the exception it raised."""
+    index: int
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+_rule = None
+
+
+def _load_rule(rule: str):
+    if rule not in RULES:
+        raise ValueError(f"Unknown rule: {rule}. Known rules: {', '.join(sorted(RULES))}")
+    module, function = RULES[rule].split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def _init_worker(rule: str):
+    global _rule
+    _rule = _load_rule(rule)
+
+
+def _evaluate(item) -> BatchResult:
+    index, args = item
+    try:
+        return BatchResult(index, _rule(*args))
+    except Exception as e:
+        # The error travels back with the instance, so one bad input does not stop the batch
+        return BatchResult(index, error=e)
+
+
+def run_batch(rule: str, instances: Iterable, processes: Optional[int] = None, chunksize: int = 16,
+              ordered: bool = True) -> Iterator[BatchResult]:
+    """
+    Evaluates a rule on every instance and yields a BatchResult per instance.
+
+    Args:
+        rule (str): One of the names in RULES.
+        instances (Iterable): Tuples of positional arguments, e.g. (mat,) for "egalitarian" or
+            (vals, money) for "equilibrium". The iterable is consumed lazily.
+        processes (int): Number of worker processes; None uses every core, and 1 runs in this process.
+        chunksize (int): Number of instances sent to a worker at a time.
+        ordered (bool): Yield results in input order if True, or as soon as each chunk completes otherwise
+            (BatchResult.index tells where each one belongs).
+
+    Yields:
+        BatchResult: value holds the rule's return value, or error the exception it raised.
+    """
+    _load_rule(rule)
+    items = ((index, tuple(args)) for index, args in enumerate(instances))
+    if processes == 1:
+        _init_worker(rule)
+        yield from map(_evaluate, items)
+        return
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(rule,)) as pool:
+        results = pool.imap(_evaluate, items, chunksize) if ordered else pool.imap_unordered(_evaluate, items, chunksize)
+        yield from results
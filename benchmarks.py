@@ -0,0 +1,218 @@
+"""
+Benchmark harness for the allocation rules of this repository.
+Sweeps the instance size (n agents/citizens, m items/sections/topics) of every rule on seeded synthetic
+instances, records wall time, peak traced memory and, for the cvxpy-backed rules, the time spent inside
+the numerical solver, and writes the measurements as JSON so runs on different commits can be compared.
+
+The report also holds the import time of the median rule modules, measured in fresh interpreters the way
+a process-pool worker imports them.
+
+Usage:
+    python benchmarks.py --output bench.json [--rules alloc equilibrium] [--repeat 3]
+    python benchmarks.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import Ex3
+import assigment3_Ex5
+from EX12_5A import compute_budget
+from EX12_5B import compute_budget_efficient
+from Q11 import is_decomposable_flow
+
+
+def random_valuations(n: int, m: int, seed: int = 0) -> np.ndarray:
+    """An (n, m) matrix of positive valuations drawn uniformly from [1, 100]."""
+    return np.random.default_rng(seed).uniform(1, 100, size=(n, m))
+
+
+def random_ballots(n: int, m: int, total_budget: float = 100.0, seed: int = 0) -> np.ndarray:
+    """n ballots over m sections; each ballot is a random split of total_budget."""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(m), size=n) * total_budget
+
+
+def random_preferences(n: int, m: int, per_citizen: int = 3, seed: int = 0) -> Tuple[List[float], List[set]]:
+    """
+    n citizens that each support per_citizen random topics out of m, and a budget that is decomposable for them:
+    every citizen's equal share is spread evenly over the topics it supports.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(per_citizen, m)
+    preferences = [set(rng.choice(m, size=k, replace=False).tolist()) for _ in range(n)]
+    budget = np.zeros(m)
+    for prefs in preferences:
+        budget[list(prefs)] += 1
+    return budget.tolist(), preferences
+
+
+def _alloc_case(n, m, seed):
+    mat = random_valuations(n, m, seed)
+    return (lambda: Ex3.alloc(mat)), (lambda: Ex3._problem(n, m)[0])
+
+
+def _equilibrium_case(n, m, seed):
+    vals = random_valuations(n, m, seed)
+    budgets = np.random.default_rng(seed + 1).uniform(1, 10, size=n)
+    return (lambda: assigment3_Ex5.equilibrium(vals, budgets)), (lambda: assigment3_Ex5.get_solver(n, m).problem)
+
+
+def _budget_case(n, m, seed):
+    votes = random_ballots(n, m, seed=seed).tolist()
+    return (lambda: compute_budget(100.0, votes)), None
+
+
+def _budget_efficient_case(n, m, seed):
+    votes = random_ballots(n, m, seed=seed).tolist()
+    return (lambda: compute_budget_efficient(100.0, votes)), None
+
+
+def _decomposable_case(n, m, seed):
+    budget, preferences = random_preferences(n, m, seed=seed)
+    return (lambda: is_decomposable_flow(budget, preferences)), None
+
+
+# Rule name -> (case builder, default (n, m) sweep). A case builder returns the call to time and, for
+# cvxpy-backed rules, a function giving the cvxpy Problem it solved (for the solver time).
+BENCHMARKS: Dict[str, Tuple[Callable, List[Tuple[int, int]]]] = {
+    "alloc": (_alloc_case, [(5, 5), (20, 20), (50, 50), (100, 100)]),
+    "equilibrium": (_equilibrium_case, [(5, 5), (20, 20), (50, 50), (100, 100)]),
+    "compute_budget": (_budget_case, [(100, 5), (1000, 10), (10000, 20), (100000, 20)]),
+    "compute_budget_efficient": (_budget_efficient_case, [(100, 5), (1000, 10), (10000, 20), (100000, 20)]),
+    "is_decomposable_flow": (_decomposable_case, [(100, 5), (1000, 10), (10000, 20), (20000, 30)]),
+}
+
+
+def measure(rule: str, n: int, m: int, repeat: int = 3, seed: int = 0) -> dict:
+    """
+    Runs one rule on one seeded instance of size (n, m), repeat times after a warm-up run.
+    Returns the best wall time, the peak memory traced during a separate run, and the solver time of
+    the best run (None for rules that do not call a solver).
+    """
+    call, problem = BENCHMARKS[rule][0](n, m, seed)
+    call()
+    best, solver_time = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        if elapsed < best:
+            best = elapsed
+            if problem is not None:
+                solver_time = problem().solver_stats.solve_time
+    # Memory is traced in its own run, as tracing slows allocations down
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "rule": rule,
+        "n": n,
+        "m": m,
+        "seed": seed,
+        "wall_time": best,
+        "solver_time": solver_time,
+        "python_time": None if solver_time is None else max(best - solver_time, 0.0),
+        "peak_memory": peak,
+    }
+
+
+# Modules whose import time is part of every report
+IMPORT_MODULES = ("EX12_5A", "EX12_5B")
+
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+sys.stderr.write(repr(time.perf_counter() - start))
+"""
+
+
+def import_time(modules: Tuple[str, ...] = IMPORT_MODULES, repeat: int = 3) -> dict:
+    """
+    Imports the modules in a fresh interpreter repeat times and returns the best import time together with
+    the number of bytes the imports wrote to stdout (a side-effect-free import writes none).
+    """
+    best, output = float("inf"), 0
+    for _ in range(repeat):
+        done = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT, *modules], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        best = min(best, float(done.stderr.strip().splitlines()[-1]))
+        output = max(output, len(done.stdout.encode()))
+    return {"modules": list(modules), "import_time": best, "stdout_bytes": output}
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rules: Optional[List[str]] = None, sizes: Optional[List[Tuple[int, int]]] = None, repeat: int = 3,
+        seed: int = 0) -> dict:
+    """Runs the sweep of every given rule (all by default) and returns the JSON-ready report."""
+    results = []
+    for rule in rules or list(BENCHMARKS):
+        for n, m in sizes or BENCHMARKS[rule][1]:
+            results.append(measure(rule, n, m, repeat, seed))
+    return {"commit": _commit(), "python": platform.python_version(), "machine": platform.machine(),
+            "imports": import_time(repeat=repeat), "results": results}
+
+
+def compare(old: dict, new: dict) -> List[dict]:
+    """Matches the measurements of two reports by (rule, n, m) and returns the speedup old/new of each."""
+    before = {(r["rule"], r["n"], r["m"]): r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        key = (r["rule"], r["n"], r["m"])
+        if key in before:
+            rows.append({"rule": r["rule"], "n": r["n"], "m": r["m"], "old": before[key]["wall_time"],
+                         "new": r["wall_time"], "speedup": before[key]["wall_time"] / r["wall_time"]})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File to write the JSON report to (stdout if omitted).")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two JSON reports.")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            old, new = json.load(f_old), json.load(f_new)
+        rows = compare(old, new)
+        for row in rows:
+            print(f"{row['rule']:<26} n={row['n']:<7} m={row['m']:<5} "
+                  f"{row['old']:.4f}s -> {row['new']:.4f}s  x{row['speedup']:.2f}")
+        if "imports" in old and "imports" in new:
+            before, after = old["imports"]["import_time"], new["imports"]["import_time"]
+            print(f"{'import ' + ', '.join(new['imports']['modules']):<48} "
+                  f"{before:.4f}s -> {after:.4f}s  x{before / after:.2f}")
+        return
+
+    report = run(args.rules, repeat=args.repeat, seed=args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Bulk binary input for the allocation rules.
+Ballots and valuation matrices are stored as .npy files and opened with np.memmap, so the NumPy paths
+(EX12_5A.compute_budget_array, EX12_5B.compute_budget_efficient_array, Ex3.alloc, ...) read them without
+parsing or copying them into Python lists. Q11 preference sets are stored in CSR form in a single .npy
+file that loads as the (indptr, indices) pair accepted by is_decomposable_sparse and DecompositionChecker.
+"""
+
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from Q11 import preferences_to_csr
+
+# Lines of CSV text parsed per chunk by csv_to_npy
+_CSV_CHUNK_LINES = 1 << 16
+
+
+def save_matrix(path: str, matrix, dtype=np.float64, columnar: bool = False):
+    """
+    Saves an (n, m) matrix of ballots or valuations as .npy.
+    With columnar=True the file is stored column-major, so each section's votes are contiguous and the
+    median rules can read the sections of a memory-mapped ballot file without transposing it in memory.
+    """
+    matrix = np.asarray(matrix, dtype=dtype)
+    if matrix.ndim != 2:
+        raise ValueError("Expected a two-dimensional matrix.")
+    np.save(path, np.asfortranarray(matrix) if columnar else np.ascontiguousarray(matrix))
+
+
+def load_matrix(path: str, mmap: bool = True) -> np.ndarray:
+    """Opens a matrix saved by save_matrix or csv_to_npy; with mmap=True it is a read-only np.memmap view."""
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def save_preferences(path: str, preferences, m: int):
+    """
+    Saves Q11 preference sets (a list of sets, or an (indptr, indices) pair) over m topics in CSR form.
+    The file holds one int64 array: [n, m, indptr (n+1 entries), indices].
+    """
+    indptr, indices = preferences_to_csr(preferences, m)
+    n = len(indptr) - 1
+    np.save(path, np.concatenate([[n, m], indptr, indices]).astype(np.int64))
+
+
+def load_preferences(path: str, mmap: bool = True) -> Tuple[Tuple[np.ndarray, np.ndarray], int]:
+    """Returns ((indptr, indices), m) for a file written by save_preferences; the arrays are views into the file."""
+    data = np.load(path, mmap_mode="r" if mmap else None)
+    n, m = int(data[0]), int(data[1])
+    return (data[2:n + 3], data[n + 3:]), m
+
+
+def _count_lines(path: str) -> int:
+    count = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+            last = block[-1:]
+    # A last line without a trailing newline still counts
+    return count + (last != b"\n")
+
+
+def _line_chunks(path: str, skip_header: int, delimiter: str, m: int) -> Iterable[str]:
+    with open(path) as f:
+        for _ in range(skip_header):
+            next(f, None)
+        chunk = []
+        for number, line in enumerate(f, start=skip_header + 1):
+            if line.strip():
+                # Chunks are parsed as one flat run of values, so a short row would silently shift the rest
+                if line.count(delimiter) != m - 1:
+                    raise ValueError(f"Every row must have {m} values (line {number}).")
+                chunk.append(line)
+            if len(chunk) == _CSV_CHUNK_LINES:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+
+def csv_to_npy(csv_path: str, npy_path: str, delimiter: str = ",", skip_header: int = 0, dtype=np.float64,
+               columnar: bool = False) -> Tuple[int, int]:
+    """
+    Converts a numeric CSV file (one ballot or valuation row per line) to an .npy file that load_matrix
+    can memory-map. The rows are parsed in chunks straight into the memory-mapped output, so memory use
+    stays bounded by the chunk size. Returns the (n, m) shape written.
+    """
+    with open(csv_path) as f:
+        for _ in range(skip_header):
+            next(f, None)
+        first = f.readline()
+    m = len(first.strip().split(delimiter))
+    # Blank lines are skipped while parsing, so the line count is only an upper bound on n
+    rows_bound = max(_count_lines(csv_path) - skip_header, 0)
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=dtype, shape=(rows_bound, m),
+                                    fortran_order=columnar)
+    n = 0
+    for text in _line_chunks(csv_path, skip_header, delimiter, m):
+        values = np.fromstring(text.replace("\n", delimiter), dtype=np.float64, sep=delimiter)
+        if values.size % m:
+            raise ValueError(f"Every row must have {m} values.")
+        rows = values.reshape(-1, m)
+        out[n:n + len(rows)] = rows
+        n += len(rows)
+    out.flush()
+    del out
+    if n != rows_bound:
+        # Rewrite with the exact row count when blank lines were skipped
+        exact = np.array(np.load(npy_path, mmap_mode="r")[:n])
+        save_matrix(npy_path, exact, dtype, columnar)
+    return n, m
@@ -0,0 +1,131 @@
+"""
+Lightweight phase instrumentation for the allocation rules (Ex3, assigment3_Ex5, Q11, EX12_5A).
+The rules report how long each phase of a call took (building the problem, cvxpy canonicalization,
+the numerical solve, extracting the result) along with solver iteration counts and problem sizes.
+Events go to every registered sink; with no sink registered nothing is measured.
+
+Example:
+    stats = instrumentation.Aggregate()
+    instrumentation.add_sink(stats)
+    ...
+    print(stats.percentiles())
+"""
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Tuple
+
+import numpy as np
+
+_sinks = []
+
+# Shared no-op context returned by phase() while no sink is registered
+_DISABLED = nullcontext()
+
+
+def add_sink(sink: Callable[[dict], None]):
+    """Registers a sink: any callable taking one event dict, such as a LoggerSink or an Aggregate."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink: Callable[[dict], None]):
+    _sinks.remove(sink)
+
+
+def enabled() -> bool:
+    return bool(_sinks)
+
+
+def emit(rule: str, phase: str, **fields):
+    """Sends one event {"rule", "phase", **fields} to every sink."""
+    if _sinks:
+        event = {"rule": rule, "phase": phase, **fields}
+        for sink in _sinks:
+            sink(event)
+
+
+class _Timer:
+    __slots__ = ("rule", "name", "fields", "start")
+
+    def __init__(self, rule, name, fields):
+        self.rule = rule
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, *exc):
+        emit(self.rule, self.name, seconds=time.perf_counter() - self.start, **self.fields)
+
+
+def phase(rule: str, name: str, **fields):
+    """
+    Context manager that emits the time spent in its block as a phase event, or does nothing if disabled.
+    It binds the event's fields dict (None when disabled), so the block can add fields known only at its end.
+    """
+    if not _sinks:
+        return _DISABLED
+    return _Timer(rule, name, fields)
+
+
+def solve(rule: str, problem, **solver_args):
+    """
+    Calls problem.solve(**solver_args) on a cvxpy problem. When enabled, its wall time is split into a
+    "canonicalize" and a "solve" event using the compilation time cvxpy measured; the solve event
+    carries the solver's iteration count and the problem size.
+    """
+    if not _sinks:
+        return problem.solve(**solver_args)
+    start = time.perf_counter()
+    value = problem.solve(**solver_args)
+    seconds = time.perf_counter() - start
+    compile_time = min(problem.compilation_time or 0.0, seconds)
+    stats = problem.solver_stats
+    sizes = problem.size_metrics
+    emit(rule, "canonicalize", seconds=compile_time)
+    emit(rule, "solve", seconds=seconds - compile_time, solver=stats.solver_name, iterations=stats.num_iters,
+         variables=sizes.num_scalar_variables,
+         constraints=sizes.num_scalar_eq_constr + sizes.num_scalar_leq_constr)
+    return value
+
+
+class LoggerSink:
+    """Sink that writes every event to a logging.Logger."""
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger("allocation")
+        self.level = level
+
+    def __call__(self, event: dict):
+        self.logger.log(self.level, "%s", event)
+
+
+class Aggregate:
+    """In-process sink that keeps the phase times of every (rule, phase) pair and summarizes them."""
+
+    def __init__(self):
+        self.seconds: Dict[Tuple[str, str], list] = defaultdict(list)
+        self.events = 0
+
+    def __call__(self, event: dict):
+        self.events += 1
+        if "seconds" in event:
+            self.seconds[(event["rule"], event["phase"])].append(event["seconds"])
+
+    def percentiles(self, q: Iterable[float] = (50, 90, 99)) -> Dict[Tuple[str, str], dict]:
+        """Returns {(rule, phase): {"count", "total", "p50", ...}} for the recorded phase times."""
+        q = list(q)
+        summary = {}
+        for key, times in self.seconds.items():
+            values = np.percentile(times, q)
+            summary[key] = {"count": len(times), "total": float(np.sum(times)),
+                            **{f"p{p:g}": float(v) for p, v in zip(q, values)}}
+        return summary
+
+    def clear(self):
+        self.seconds.clear()
+        self.events = 0
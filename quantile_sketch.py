@@ -0,0 +1,158 @@
+"""
+Mergeable quantile sketch for the per-section votes of the median budget rules (EX12_5A / EX12_5B).
+Ballot sets that do not fit in memory are summarized chunk by chunk in constant memory per section,
+and sketches built on independent shards can be merged into one.
+"""
+
+import math
+from typing import Callable, Iterable, Tuple
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    A deterministic compactor sketch (in the style of KLL) that summarizes all m sections in lockstep.
+
+    Level h holds votes of weight 2**h. When a level reaches k items per section, every section's buffer
+    is sorted and every other item is promoted to the next level with double weight. A compaction at
+    level h moves the rank of any value by at most 2**h, and the sketch keeps the exact sum of these
+    moves in rank_error, so every estimated order statistic is within rank_error ranks of the true one.
+
+    Parameters
+    ----------
+    num_sections : int
+        The number of sections m; every ballot must hold one vote per section.
+    eps : float
+        Target rank error as a fraction of the number of ballots.
+    max_ballots : int
+        The largest number of ballots for which the eps guarantee must hold; k is sized from it.
+    """
+
+    def __init__(self, num_sections: int, eps: float = 0.01, max_ballots: int = 2 ** 32):
+        if not 0 < eps < 1:
+            raise ValueError("eps must be in (0, 1).")
+        self.num_sections = num_sections
+        self.eps = eps
+        self.k = 2 * math.ceil(math.log2(max(max_ballots, 2)) / (2 * eps))
+        self.levels = [np.empty((num_sections, 0))]
+        self.count = 0
+        self.rank_error = 0
+        self.minimum = np.full(num_sections, np.inf)
+        self.maximum = np.full(num_sections, -np.inf)
+        self._offset = 0
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable, eps: float = 0.01, max_ballots: int = 2 ** 32) -> "QuantileSketch":
+        """Builds a sketch from an iterable of ballot chunks, each of shape (b, m)."""
+        sketch = None
+        for chunk in chunks:
+            chunk = np.asarray(chunk, dtype=float)
+            if sketch is None:
+                sketch = cls(chunk.shape[1], eps, max_ballots)
+            sketch.update(chunk)
+        if sketch is None:
+            raise ValueError("No ballots were given.")
+        return sketch
+
+    def update(self, ballots):
+        """Adds a chunk of ballots given as an array of shape (b, m)."""
+        ballots = np.asarray(ballots, dtype=float)
+        if ballots.ndim != 2 or ballots.shape[1] != self.num_sections:
+            raise ValueError("Each ballot must contain one vote per section.")
+        if len(ballots) == 0:
+            return
+        self.minimum = np.minimum(self.minimum, ballots.min(axis=0))
+        self.maximum = np.maximum(self.maximum, ballots.max(axis=0))
+        self.levels[0] = np.concatenate([self.levels[0], ballots.T], axis=1)
+        self.count += len(ballots)
+        self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        """Merges another sketch (with the same number of sections and k) into this one."""
+        if other.num_sections != self.num_sections or other.k != self.k:
+            raise ValueError("Only sketches with the same number of sections and k can be merged.")
+        for h, buf in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty((self.num_sections, 0)))
+            self.levels[h] = np.concatenate([self.levels[h], buf], axis=1)
+        self.count += other.count
+        self.rank_error += other.rank_error
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if buf.shape[1] >= self.k:
+                buf = np.sort(buf, axis=1)
+                size = buf.shape[1] - buf.shape[1] % 2
+                # Alternate the kept half so that rounding errors of consecutive compactions tend to cancel
+                promoted = buf[:, self._offset:size:2]
+                self._offset ^= 1
+                self.levels[h] = buf[:, size:]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty((self.num_sections, 0)))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted], axis=1)
+                self.rank_error += 2 ** h
+            h += 1
+
+    def sections(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the summarized votes of every section as (values, weights), both of shape (m, L):
+        each row of values is sorted in ascending order, and weights holds the number of ballots each value stands for.
+        """
+        values = np.concatenate(self.levels, axis=1)
+        weights = np.concatenate([np.full(buf.shape[1], 2 ** h, dtype=np.int64)
+                                  for h, buf in enumerate(self.levels)])
+        order = np.argsort(values, axis=1, kind="stable")
+        return np.take_along_axis(values, order, axis=1), weights[order]
+
+    def bounding_sections(self) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns two weighted representations (values, weights) whose order statistics bound the true ones.
+        In the lower one every order statistic is shifted down by rank_error ranks, in the upper one up by
+        rank_error ranks, clipped to the exact minimum and maximum vote of each section.
+        """
+        values, weights = self.sections()
+        r = self.rank_error
+        cum = np.cumsum(weights, axis=1)
+        zeros = np.zeros((self.num_sections, 1), dtype=np.int64)
+        extra = np.full((self.num_sections, 1), r, dtype=np.int64)
+        top_trimmed = np.diff(np.minimum(cum, self.count - r), axis=1, prepend=zeros)
+        bottom_trimmed = np.diff(np.maximum(cum - r, 0), axis=1, prepend=zeros)
+        lower = (np.concatenate([self.minimum[:, None], values], axis=1),
+                 np.concatenate([extra, top_trimmed], axis=1))
+        upper = (np.concatenate([values, self.maximum[:, None]], axis=1),
+                 np.concatenate([bottom_trimmed, extra], axis=1))
+        return lower, upper
+
+
+def weighted_order_statistics(values: np.ndarray, weights: np.ndarray) -> Tuple[int, Callable]:
+    """
+    Prepares order-statistic lookups on a weighted representation of m sections.
+
+    Args:
+        values (np.ndarray): Array of shape (m, L) with each row sorted in ascending order.
+        weights (np.ndarray): Array of shape (m, L) of non-negative integer multiplicities; every row must
+            have the same total n.
+
+    Returns:
+        Tuple[int, Callable]: n, and a function lookup(rows, idx) returning the idx-th smallest (0-based)
+            vote of each given row; rows and idx are broadcast together.
+    """
+    m = values.shape[0]
+    cum = np.cumsum(weights, axis=1)
+    n = int(cum[0, -1]) if cum.size else 0
+    if np.any(cum[:, -1] != n):
+        raise ValueError("Every section must have the same total weight.")
+    # Offsetting each row's cumulative weights by row*n turns the per-row searches into one flat search
+    flat_cum = (cum + np.arange(m)[:, None] * n).ravel()
+    flat_values = values.ravel()
+
+    def lookup(rows, idx):
+        return flat_values[np.searchsorted(flat_cum, idx + np.asarray(rows) * n, side="right")]
+
+    return n, lookup
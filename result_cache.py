@@ -0,0 +1,195 @@
+"""
+Opt-in result cache for the solver-backed allocation rules (Ex3.alloc, assigment3_Ex5.equilibrium,
+Q11.is_decomposable_flow), which are pure functions of their numeric inputs.
+Results are keyed on a hash of the inputs rounded to a fixed number of decimals plus the keyword
+arguments (solver settings), and kept in an in-memory LRU tier backed by an optional SQLite file.
+"""
+
+import hashlib
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import wraps
+from numbers import Number
+from typing import Callable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+_MISSING = object()
+
+# Version of the key encoding; bump it whenever _encode changes, so an on-disk tier written by an older
+# version is never served under the new encoding
+KEY_FORMAT = 1
+
+
+def _encode(value, decimals: Optional[int], out: list):
+    if value is None or isinstance(value, (bool, str)):
+        out.append(f"v{value!r};".encode())
+    elif isinstance(value, (Number, np.ndarray, list, tuple)) and _encode_array(value, decimals, out):
+        pass
+    elif sp.issparse(value):
+        mat = sp.csr_matrix(value, dtype=float, copy=True)
+        mat.sum_duplicates()
+        mat.sort_indices()
+        out.append(f"c{mat.shape};".encode())
+        for part in (mat.indptr.astype(np.int64), mat.indices.astype(np.int64), mat.data):
+            _encode_array(part, decimals, out)
+    elif isinstance(value, (set, frozenset)):
+        out.append(f"s{len(value)};".encode())
+        for item in sorted(value):
+            _encode(item, decimals, out)
+    elif isinstance(value, (list, tuple)):
+        out.append(f"l{len(value)};".encode())
+        for item in value:
+            _encode(item, decimals, out)
+    elif isinstance(value, dict):
+        out.append(f"d{len(value)};".encode())
+        for name in sorted(value):
+            _encode(name, decimals, out)
+            _encode(value[name], decimals, out)
+    else:
+        raise TypeError(f"Cannot build a cache key from {type(value).__name__}.")
+
+
+def _encode_array(value, decimals: Optional[int], out: list) -> bool:
+    # Anything that converts to a numeric array (scalars, matrices, vote lists) is hashed by its rounded values
+    try:
+        arr = np.asarray(value)
+    except (TypeError, ValueError):
+        return False
+    if arr.dtype.kind not in "biuf":
+        return False
+    arr = arr.astype(float)
+    if decimals is not None:
+        arr = np.round(arr, decimals)
+    # Adding 0.0 turns -0.0 into 0.0, so both give the same bytes
+    arr = np.ascontiguousarray(arr + 0.0)
+    out.append(f"a{arr.shape};".encode())
+    out.append(arr.tobytes())
+    return True
+
+
+def cache_key(name: str, args: tuple, kwargs: dict, decimals: Optional[int] = 9) -> str:
+    """
+    Returns the hex digest identifying a call of the named function with these arguments. The key format
+    version and the rounding precision are hashed too, so caches with different decimals that share one
+    SQLite file never serve each other's results. With decimals=None the inputs are not rounded, and only
+    exactly equal inputs share a key.
+    """
+    parts = [f"v{KEY_FORMAT};d{decimals};".encode()]
+    _encode((name, list(args), kwargs), decimals, parts)
+    return hashlib.sha256(b"".join(parts)).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of function results.
+
+    Parameters
+    ----------
+    path : str or None
+        SQLite file for the on-disk tier; None keeps results in memory only.
+    max_memory_items : int
+        Size of the in-memory LRU tier.
+    max_disk_items : int
+        Size of the on-disk tier; the least recently used rows are evicted beyond it.
+    decimals : int
+        Inputs are rounded to this many decimals before hashing, so inputs that differ by less are the same key.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_items: int = 1024, max_disk_items: int = 100_000,
+                 decimals: int = 9):
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.decimals = decimals
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Results are stored pickled, so callers cannot mutate a cached value through a returned array
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._clock = 0
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, used INTEGER)")
+            self._clock = self._db.execute("SELECT COALESCE(MAX(used), 0) FROM results").fetchone()[0]
+
+    def __len__(self) -> int:
+        if self._db is not None:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return len(self._memory)
+
+    def get(self, key: str, default=None):
+        """Returns the cached value for key, or default; counts a hit or a miss."""
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return pickle.loads(blob)
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._clock += 1
+                    self._db.execute("UPDATE results SET used = ? WHERE key = ?", (self._clock, key))
+                    self._db.commit()
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return pickle.loads(row[0])
+            self.misses += 1
+            return default
+
+    def put(self, key: str, value):
+        """Stores value under key in both tiers, evicting the least recently used entries beyond the limits."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, blob)
+            if self._db is not None:
+                self._clock += 1
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, blob, self._clock))
+                self._db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used DESC "
+                                 "LIMIT -1 OFFSET ?)", (self.max_disk_items,))
+                self._db.commit()
+
+    def _remember(self, key: str, blob: bytes):
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry from both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def wrap(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Returns a cached version of func. The name (by default module.qualname) is part of the key,
+        so several functions can share one cache; keyword arguments such as solver settings are too.
+        """
+        name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def cached(*args, **kwargs):
+            key = cache_key(name, args, kwargs, self.decimals)
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                self.put(key, value)
+            return value
+
+        cached.cache = self
+        return cached
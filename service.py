@@ -0,0 +1,183 @@
+"""
+asyncio front end for the blocking allocation solvers (Ex3.alloc, assigment3_Ex5.equilibrium,
+Q11.is_decomposable_flow), for use inside an event loop such as an HTTP handler.
+
+Solves run on a bounded thread pool, never on the event loop. Identical requests that arrive while one
+is in flight share its computation, and same-shape requests for the cvxpy-backed rules are collected for a
+short window and solved as one batch on that shape's compiled problem. The number of distinct pending
+computations is bounded, and each request can carry its own timeout.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+import Ex3
+import assigment3_Ex5
+import Q11
+from result_cache import cache_key
+
+RULES: Dict[str, Callable] = {
+    "alloc": Ex3.alloc,
+    "equilibrium": assigment3_Ex5.equilibrium,
+    "is_decomposable_flow": Q11.is_decomposable_flow,
+}
+
+# Rules whose dense instances of one shape share a cached compiled problem; they are solved in batches,
+# one batch per shape at a time, so the shared problem is never used by two threads at once
+BATCHED = {"alloc", "equilibrium"}
+
+
+class ServiceOverloaded(RuntimeError):
+    """Raised when a request would exceed the service's limit of pending computations."""
+
+
+def _run_batch(func: Callable, items: list) -> list:
+    results = []
+    for args, kwargs in items:
+        try:
+            results.append((True, func(*args, **kwargs)))
+        except Exception as e:
+            results.append((False, e))
+    return results
+
+
+class AllocationService:
+    """
+    Parameters
+    ----------
+    max_workers : int
+        Number of solver threads.
+    max_pending : int
+        Largest number of distinct computations queued or running; further requests raise ServiceOverloaded.
+    batch_window : float
+        Seconds to wait for more same-shape requests before a batch is solved.
+    max_batch : int
+        Largest number of instances solved in one batch.
+    rules : dict or None
+        Rule name -> function; defaults to RULES.
+    batched : Iterable[str] or None
+        Names of the rules to batch by shape; defaults to BATCHED.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 1024, batch_window: float = 0.002,
+                 max_batch: int = 64, rules: Optional[Dict[str, Callable]] = None,
+                 batched: Optional[Iterable[str]] = None):
+        self.max_pending = max_pending
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.rules = RULES if rules is None else rules
+        self.batched = set(BATCHED if batched is None else batched)
+        self.stats = {"requests": 0, "coalesced": 0, "computations": 0, "batches": 0}
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._in_flight = {}
+        self._queues = {}
+        self._locks = {}
+        self._tasks = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._in_flight)
+
+    async def submit(self, rule: str, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Computes rule(*args, **kwargs) off the event loop and returns its result (or raises its exception).
+        Raises asyncio.TimeoutError after timeout seconds; the computation itself still completes for any
+        other request waiting on it.
+        """
+        if rule not in self.rules:
+            raise ValueError(f"Unknown rule: {rule}")
+        self.stats["requests"] += 1
+        # Only exact duplicates share a computation, so the key does not round the inputs
+        key = cache_key(rule, args, kwargs, decimals=None)
+        future = self._in_flight.get(key)
+        if future is None:
+            if len(self._in_flight) >= self.max_pending:
+                raise ServiceOverloaded(f"{len(self._in_flight)} computations are already pending.")
+            # Computed before the future is registered: a malformed input raises here, and must not
+            # leave a future behind that later duplicates would wait on forever
+            batch_key = self._batch_key(rule, args)
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self._schedule(rule, args, kwargs, future, batch_key)
+        else:
+            self.stats["coalesced"] += 1
+        # The shield keeps one requester's timeout or cancellation from cancelling the shared computation
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def _finish(self, key, future):
+        self._in_flight.pop(key, None)
+        # Mark the exception as retrieved, in case every requester has already timed out
+        if not future.cancelled():
+            future.exception()
+
+    async def alloc(self, mat, timeout: Optional[float] = None, **kwargs):
+        return await self.submit("alloc", mat, timeout=timeout, **kwargs)
+
+    async def equilibrium(self, vals, money, timeout: Optional[float] = None, **kwargs):
+        return await self.submit("equilibrium", vals, money, timeout=timeout, **kwargs)
+
+    async def is_decomposable_flow(self, budget, preferences, timeout: Optional[float] = None, **kwargs):
+        return await self.submit("is_decomposable_flow", budget, preferences, timeout=timeout, **kwargs)
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _batch_key(self, rule, args):
+        if rule not in self.batched or not args or sp.issparse(args[0]):
+            return None
+        return rule, np.shape(args[0])
+
+    def _schedule(self, rule, args, kwargs, future, batch_key):
+        if batch_key is None:
+            self._spawn(self._flush_single(rule, args, kwargs, future))
+            return
+        queue = self._queues.setdefault(batch_key, [])
+        queue.append((args, kwargs, future))
+        if len(queue) == 1:
+            self._spawn(self._flush_batches(batch_key))
+
+    async def _flush_single(self, rule, args, kwargs, future):
+        await self._deliver(rule, [(args, kwargs, future)])
+
+    async def _flush_batches(self, batch_key):
+        await asyncio.sleep(self.batch_window)
+        async with self._locks.setdefault(batch_key, asyncio.Lock()):
+            while self._queues.get(batch_key):
+                queue = self._queues[batch_key]
+                self._queues[batch_key] = queue[self.max_batch:]
+                self.stats["batches"] += 1
+                await self._deliver(batch_key[0], queue[:self.max_batch])
+            self._queues.pop(batch_key, None)
+
+    async def _deliver(self, rule, items):
+        self.stats["computations"] += len(items)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._executor, _run_batch, self.rules[rule],
+                                                 [(args, kwargs) for args, kwargs, _ in items])
+        except Exception as e:
+            results = [(False, e)] * len(items)
+        for (_, _, future), (ok, value) in zip(items, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def close(self):
+        """Shuts the solver threads down after the running computations finish."""
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
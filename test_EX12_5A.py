@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from EX12_5A import compute_budget, compute_budget_array
+
+
+def bisection_budget(total_budget, citizen_votes, iterations=200):
+    n = len(citizen_votes)
+    m = len(citizen_votes[0])
+
+    def allocation_for_t(t):
+        res = []
+        for j in range(m):
+            all_votes = [citizen_votes[i][j] for i in range(n)]
+            all_votes += [total_budget * min(1, (i + 1) * t) for i in range(n - 1)]
+            all_votes.sort()
+            res.append(all_votes[len(all_votes) // 2])
+        return res
+
+    left, right = 0.0, 1.0
+    for _ in range(iterations):
+        mid = (left + right) / 2
+        if sum(allocation_for_t(mid)) > total_budget:
+            right = mid
+        else:
+            left = mid
+    return allocation_for_t((left + right) / 2)
+
+
+class TestComputeBudget(unittest.TestCase):
+
+    def assertBudgetAlmostEqual(self, result, expected):
+        self.assertEqual(len(result), len(expected))
+        for r, e in zip(result, expected):
+            self.assertAlmostEqual(r, e, delta=1e-9)
+
+    def test_all_on_first_and_last(self):
+        self.assertBudgetAlmostEqual(compute_budget(100, [[100, 0, 0], [0, 0, 100]]), [50.0, 0.0, 50.0])
+
+    def test_single_support_per_section(self):
+        self.assertBudgetAlmostEqual(compute_budget(90, [[90, 0, 0], [0, 90, 0], [0, 0, 90]]), [30.0, 30.0, 30.0])
+
+    def test_all_equal_votes(self):
+        self.assertBudgetAlmostEqual(compute_budget(75, [[25, 25, 25]] * 3), [25.0, 25.0, 25.0])
+
+    def test_single_citizen(self):
+        self.assertBudgetAlmostEqual(compute_budget(10, [[7, 3]]), [7.0, 3.0])
+
+    def test_sum_is_exact(self):
+        votes = [[80, 10, 10], [10, 80, 10], [10, 10, 80], [33, 33, 34]]
+        self.assertAlmostEqual(sum(compute_budget(100, votes)), 100, delta=1e-9)
+
+    def test_matches_bisection(self):
+        votes = [[50, 50, 50], [100, 25, 25], [25, 100, 25], [25, 25, 100]]
+        self.assertBudgetAlmostEqual(compute_budget(150, votes), bisection_budget(150, votes))
+        votes = [[100, 50, 50], [0, 100, 100], [100, 100, 0]]
+        self.assertBudgetAlmostEqual(compute_budget(200, votes), bisection_budget(200, votes))
+
+    def test_array_matches_lists(self):
+        votes = [[80, 10, 10], [10, 80, 10], [10, 10, 80], [33, 33, 34]]
+        result = compute_budget_array(100, np.array(votes))
+        self.assertIsInstance(result, np.ndarray)
+        self.assertBudgetAlmostEqual(result.tolist(), compute_budget(100, votes))
+
+    def test_array_large_random(self):
+        rng = np.random.default_rng(0)
+        votes = np.round(rng.dirichlet(np.ones(6) * 0.5, size=2000) * 120)
+        result = compute_budget_array(120, votes)
+        self.assertAlmostEqual(result.sum(), 120, delta=1e-9)
+        self.assertBudgetAlmostEqual(result.tolist(), bisection_budget(120, votes.tolist(), iterations=60))
+
+
+if __name__ == "__main__":
+    unittest.main()
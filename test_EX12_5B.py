@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from EX12_5B import compute_budget_efficient, compute_budget_efficient_array
+
+
+class TestComputeBudgetEfficient(unittest.TestCase):
+
+    def assertBudgetAlmostEqual(self, result, expected):
+        self.assertEqual(len(result), len(expected))
+        for r, e in zip(result, expected):
+            self.assertAlmostEqual(r, e, delta=1e-9)
+
+    def test_all_on_first_and_last(self):
+        self.assertBudgetAlmostEqual(compute_budget_efficient(100, [[100, 0, 0], [0, 0, 100]]), [50.0, 0.0, 50.0])
+
+    def test_normalizes_medians(self):
+        result = compute_budget_efficient(150, [[50, 50, 50], [100, 25, 25], [25, 100, 25], [25, 25, 100]])
+        self.assertBudgetAlmostEqual(result, [50.0, 50.0, 50.0])
+
+    def test_all_medians_zero(self):
+        self.assertBudgetAlmostEqual(compute_budget_efficient(90, [[90, 0, 0], [0, 90, 0], [0, 0, 90]]),
+                                     [30.0, 30.0, 30.0])
+
+    def test_array_matches_median(self):
+        rng = np.random.default_rng(1)
+        for n in (1, 2, 7, 10):
+            votes = rng.random((n, 5)) * 20
+            medians = np.median(votes, axis=0)
+            expected = medians * (20 / medians.sum())
+            result = compute_budget_efficient_array(20, votes)
+            self.assertIsInstance(result, np.ndarray)
+            self.assertBudgetAlmostEqual(result.tolist(), expected.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from EX12_5B import compute_budget_efficient_array
+from EX12_5B_parallel import compute_budget_efficient_parallel
+
+
+class TestParallelMedians(unittest.TestCase):
+
+    def check(self, votes, **kwargs):
+        np.testing.assert_array_equal(compute_budget_efficient_parallel(100, votes, **kwargs),
+                                      compute_budget_efficient_array(100, votes))
+
+    def test_threads(self):
+        rng = np.random.default_rng(0)
+        self.check(rng.random((1001, 7)), threads=3)
+        self.check(rng.random((1000, 2)), threads=8)
+
+    def test_processes(self):
+        rng = np.random.default_rng(1)
+        self.check(rng.random((1001, 5)), processes=2)
+        self.check(rng.random((2000, 4)), processes=3)
+        # Heavy ties: the medians coincide with sampled pivots
+        self.check(rng.integers(0, 3, (3000, 6)).astype(float), processes=2)
+        self.check(np.round(rng.random((5000, 3)) * 100), processes=2)
+
+    def test_few_ballots(self):
+        self.check(np.array([[1.0, 2.0, 3.0]]), processes=4)
+        self.check(np.array([[1.0, 2.0], [3.0, 5.0]]), processes=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from EX12_5A import compute_budget_array
+from EX12_5B import compute_budget_efficient_array
+from EX12_5_stream import BallotAggregator
+
+
+class TestBallotAggregator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.votes = np.round(rng.dirichlet(np.ones(4), size=50) * 100, 1)
+
+    def test_matches_batch_rules(self):
+        agg = BallotAggregator(100, 4, capacity=2)
+        for ballot in self.votes:
+            agg.add_ballot(ballot)
+        self.assertEqual(len(agg), 50)
+        np.testing.assert_allclose(agg.efficient_allocation(), compute_budget_efficient_array(100, self.votes))
+        np.testing.assert_allclose(agg.allocation(), compute_budget_array(100, self.votes))
+
+    def test_remove_ballot(self):
+        agg = BallotAggregator(100, 4)
+        agg.add_ballots(self.votes)
+        for ballot in self.votes[:7]:
+            agg.remove_ballot(ballot)
+        rest = self.votes[7:]
+        np.testing.assert_allclose(agg.medians(), np.median(rest, axis=0))
+        np.testing.assert_allclose(agg.allocation(), compute_budget_array(100, rest))
+
+    def test_remove_unknown_ballot(self):
+        agg = BallotAggregator(100, 2)
+        agg.add_ballot([60, 40])
+        with self.assertRaises(ValueError):
+            agg.remove_ballot([50, 50])
+        self.assertEqual(len(agg), 1)
+
+    def test_wrong_ballot_length(self):
+        agg = BallotAggregator(100, 3)
+        with self.assertRaises(ValueError):
+            agg.add_ballot([100, 0])
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            BallotAggregator(100, 3).allocation()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+import numpy as np
+from Q11 import (DecompositionChecker, compress_preferences, expand_flow, hall_violation, is_decomposable_flow,
+                 is_decomposable_sparse, preference_classes, preferences_to_csr)
+
+
+class TestDecomposable(unittest.TestCase):
+
+    def assertValidFlow(self, budget, preferences, flow):
+        flow = flow.toarray()
+        n = len(preferences)
+        np.testing.assert_allclose(flow.sum(axis=0), budget)
+        np.testing.assert_allclose(flow.sum(axis=1), sum(budget) / n)
+        for i, j in zip(*np.nonzero(flow)):
+            self.assertIn(j, preferences[i])
+
+    def test_classic_example(self):
+        budget = [400, 50, 50, 0]
+        preferences = [{0, 1}, {0, 2}, {0, 3}, {1, 2}, {0}]
+        possible, flow = is_decomposable_sparse(budget, preferences)
+        self.assertTrue(possible)
+        self.assertEqual(flow.shape, (5, 4))
+        self.assertValidFlow(budget, preferences, flow)
+
+    def test_no_preferences(self):
+        self.assertFalse(is_decomposable_sparse([10, 20], [set(), set()])[0])
+
+    def test_uncovered_topic(self):
+        self.assertFalse(is_decomposable_sparse([20, 30], [{0}, {0}])[0])
+
+    def test_zero_budget(self):
+        possible, flow = is_decomposable_sparse([0, 0, 0], [set(), set()])
+        self.assertTrue(possible)
+        self.assertEqual(flow.nnz, 0)
+
+    def test_csr_input(self):
+        indptr, indices = preferences_to_csr([{0, 1}, {0}, {1}], 2)
+        possible, flow = is_decomposable_sparse([50, 50], (indptr, indices))
+        self.assertTrue(possible)
+        self.assertValidFlow([50, 50], [{0, 1}, {0}, {1}], flow)
+
+    def test_tuple_of_sets(self):
+        self.assertTrue(is_decomposable_flow([1, 1], ({0}, {1}))[0])
+        self.assertFalse(is_decomposable_flow([10, 0], ([1], [0]))[0])
+        self.assertFalse(is_decomposable_sparse([10, 0], ([1], [0]))[0])
+        self.assertEqual(hall_violation([10, 0], ([1], [0])), {0})
+
+    def test_classes(self):
+        indptr, indices = preferences_to_csr([{0, 1}, {1}, {1, 0}, {1}, {2}], 3)
+        class_of, counts, _, _ = preference_classes(indptr, indices, 3)
+        self.assertEqual(len(counts), 3)
+        self.assertEqual(class_of[0], class_of[2])
+        self.assertEqual(class_of[1], class_of[3])
+        self.assertEqual(sorted(counts.tolist()), [1, 2, 2])
+
+    def test_matches_networkx(self):
+        rng = np.random.default_rng(0)
+        for m in (3, 70):
+            for _ in range(20):
+                budget = np.round(rng.random(m) * 10).tolist()
+                preferences = [set(rng.choice(m, rng.integers(0, 3), replace=False).tolist()) for _ in range(8)]
+                possible, flow = is_decomposable_sparse(budget, preferences)
+                self.assertEqual(possible, is_decomposable_flow(budget, preferences)[0])
+                if possible:
+                    self.assertValidFlow(budget, preferences, flow)
+
+    def test_hall_witness(self):
+        self.assertEqual(hall_violation([20, 30], [{0}, {0}]), {1})
+        self.assertEqual(hall_violation([10, 20], [set(), set()]), {0, 1})
+        self.assertIsNone(hall_violation([400, 50, 50, 0], [{0, 1}, {0, 2}, {0, 3}, {1, 2}, {0}]))
+
+    def test_hall_fast_path(self):
+        possible, witness = is_decomposable_flow([20, 30], [{0}, {0}], return_flow=False)
+        self.assertFalse(possible)
+        self.assertEqual(witness, {1})
+        self.assertEqual(is_decomposable_flow([0, 0], [set()], return_flow=False), (True, None))
+
+    def test_hall_matches_flow(self):
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            m = int(rng.integers(1, 7))
+            budget = np.round(rng.random(m) * 10).tolist()
+            preferences = [set(rng.choice(m, rng.integers(0, m + 1), replace=False).tolist()) for _ in range(6)]
+            witness = hall_violation(budget, preferences)
+            self.assertEqual(witness is None, is_decomposable_sparse(budget, preferences)[0])
+            if witness is not None:
+                supporters = sum(1 for p in preferences if p & witness)
+                self.assertGreater(sum(budget[j] for j in witness), sum(budget) / 6 * supporters)
+
+    def test_compressed_preferences(self):
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            budget = np.round(rng.random(3) * 10).tolist()
+            preferences = [set(rng.choice(3, rng.integers(0, 3), replace=False).tolist()) for _ in range(30)]
+            classes, counts, class_of = compress_preferences(preferences, 3)
+            self.assertLessEqual(len(counts), 8)
+            possible = is_decomposable_sparse(budget, preferences)[0]
+            self.assertEqual(hall_violation(budget, classes, counts) is None, possible)
+            possible_flow, flow = is_decomposable_flow(budget, classes, weights=counts)
+            self.assertEqual(possible_flow, possible)
+            self.assertEqual(len(flow["src"]), len(counts))
+            possible_sparse, class_flow = is_decomposable_sparse(budget, classes, weights=counts)
+            self.assertEqual(possible_sparse, possible)
+            if possible:
+                self.assertValidFlow(budget, preferences, expand_flow(class_flow, class_of))
+                expanded = expand_flow(flow, class_of)
+                self.assertEqual(len(expanded["src"]), len(preferences))
+                self.assertAlmostEqual(sum(expanded["src"].values()), sum(budget), delta=1e-6)
+        with self.assertRaises(ValueError):
+            is_decomposable_sparse([1, 1], [{0}, {1}], weights=[1])
+
+
+class TestDecompositionChecker(unittest.TestCase):
+
+    def test_edits_match_full_recheck(self):
+        rng = np.random.default_rng(2)
+        budget = [30.0, 10.0, 20.0]
+        preferences = [{0}, {0, 1}, {2}, {1, 2}, {0, 2}]
+        checker = DecompositionChecker(budget, preferences)
+        self.assertEqual(checker.is_decomposable(), is_decomposable_sparse(budget, preferences)[0])
+        for _ in range(40):
+            i, j = int(rng.integers(5)), int(rng.integers(3))
+            action = rng.integers(3)
+            if action == 0:
+                budget[j] = float(rng.integers(0, 40))
+                result = checker.set_budget(j, budget[j])
+            elif action == 1:
+                preferences[i] = preferences[i] | {j}
+                result = checker.add_preference(i, j)
+            else:
+                preferences[i] = preferences[i] - {j}
+                result = checker.remove_preference(i, j)
+            self.assertEqual(result, is_decomposable_sparse(budget, preferences)[0])
+            if result:
+                flow = checker.flow().toarray()
+                np.testing.assert_allclose(flow.sum(axis=0), budget, atol=1e-9)
+
+    def test_max_feasible_amount(self):
+        checker = DecompositionChecker([10, 10], [{0}, {0, 1}])
+        self.assertTrue(checker.is_decomposable())
+        self.assertAlmostEqual(checker.max_feasible_amount(1), 10.0, delta=1e-6)
+        self.assertEqual(checker.max_feasible_amount(0), float("inf"))
+        self.assertEqual(checker.budget, [10.0, 10.0])
+
+    def test_max_feasible_amount_requires_feasible_budget(self):
+        checker = DecompositionChecker([20, 30], [{0}, {0}])
+        with self.assertRaises(ValueError):
+            checker.max_feasible_amount(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
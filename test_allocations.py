@@ -0,0 +1,20 @@
+import unittest
+import numpy as np
+import scipy.sparse as sp
+from allocations import spread_unvalued
+
+
+class TestSpreadUnvalued(unittest.TestCase):
+
+    def test_dense_and_sparse(self):
+        allocation = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        valued = np.array([True, False, True])
+        expected = [[1.0, 0.5, 0.0], [0.0, 0.5, 1.0]]
+        sparse = spread_unvalued(sp.csr_matrix(allocation), valued)
+        self.assertTrue(sp.issparse(sparse))
+        np.testing.assert_array_equal(sparse.toarray(), expected)
+        np.testing.assert_array_equal(spread_unvalued(allocation, valued), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
-from assigment3_Ex5 import equilibrium
+import scipy.sparse as sp
+from assigment3_Ex5 import equilibrium, equilibrium_batch, equilibrium_sweep, get_solver, _recover_prices
 
 def round_alloc(a):
     return np.round(a, 2)
@@ -64,6 +65,102 @@ class TestEquilibrium(unittest.TestCase):
         self.assertAlmostEqual(a[0][0], 1.0, delta=0.01)
         self.assertAlmostEqual(a[1][1], 1.0, delta=0.01)
 
+    def test_batch(self):
+        instances = [([[9, 1], [1, 9]], [50, 50]), ([[3, 2], [4, 1]], [30, 70]), ([[5], [2], [9]], [10, 10, 10])]
+        results = equilibrium_batch(instances)
+        self.assertEqual(len(results), 3)
+        for (prefs, budgets), res in zip(instances, results):
+            single = equilibrium(prefs, budgets)
+            np.testing.assert_allclose(res["allocation"], single["allocation"], atol=1e-4)
+            self.assertAlmostEqual(sum(res["prices"]), sum(budgets), delta=0.01)
+
+    def test_solver_cached_per_shape(self):
+        self.assertIs(get_solver(2, 3), get_solver(2, 3))
+        self.assertIsNot(get_solver(2, 3), get_solver(3, 2))
+        with self.assertRaises(ValueError):
+            get_solver(2, 3).solve([[1, 1], [1, 1]], [1, 1])
+
+    def test_dual_prices_match_primal_recovery(self):
+        rng = np.random.default_rng(1)
+        vals = rng.random((8, 5))
+        budgets = rng.random(8) + 1
+        res = equilibrium(vals, budgets)
+        primal = _recover_prices(res["allocation"], vals, budgets)
+        np.testing.assert_allclose(res["prices"], primal, rtol=1e-3, atol=1e-4)
+        self.assertAlmostEqual(sum(res["prices"]), budgets.sum(), delta=1e-3)
+
+    def test_sparse_valuations(self):
+        vals = [[3, 0, 1, 0], [0, 2, 0, 0], [1, 1, 0, 0]]
+        res = equilibrium(sp.csr_matrix(vals), [1, 2, 3])
+        self.assertTrue(sp.issparse(res["allocation"]))
+        dense = res["allocation"].toarray()
+        np.testing.assert_allclose(dense[:, 3], [1 / 3] * 3)
+        self.assertEqual(res["prices"][3], 0)
+        ref = equilibrium([row[:3] for row in vals], [1, 2, 3])
+        np.testing.assert_allclose(dense[:, :3], ref["allocation"], atol=1e-4)
+        np.testing.assert_allclose(res["prices"][:3], ref["prices"], atol=1e-4)
+        with self.assertRaises(ValueError):
+            equilibrium(sp.csr_matrix([[1, 0], [0, 0]]), [1, 1])
+
+
+class TestProportionalResponse(unittest.TestCase):
+
+    def test_matches_cvxpy(self):
+        rng = np.random.default_rng(0)
+        vals = rng.random((6, 4)) + 0.1
+        budgets = rng.random(6) + 1
+        res = equilibrium(vals, budgets, method="proportional_response", tol=1e-6, certificate=True)
+        ref = equilibrium(vals, budgets)
+        np.testing.assert_allclose(res["prices"], ref["prices"], atol=0.01)
+        self.assertLessEqual(res["duality_gap"], 1e-6 * budgets.sum())
+        self.assertGreaterEqual(res["duality_gap"], -1e-9)
+
+    def test_corner_solution(self):
+        res = equilibrium([[9, 1], [1, 9]], [50, 50], method="proportional_response")
+        a = round_alloc(res["allocation"])
+        self.assertAlmostEqual(a[0][0], 1.0, delta=0.01)
+        self.assertAlmostEqual(a[1][1], 1.0, delta=0.01)
+
+    def test_unvalued_item(self):
+        res = equilibrium([[10, 0], [5, 0]], [60, 40], method="proportional_response")
+        np.testing.assert_allclose(res["prices"], [100, 0], atol=1e-6)
+        np.testing.assert_allclose(res["allocation"][:, 1], [0.5, 0.5])
+
+    def test_sparse(self):
+        vals = sp.csr_matrix([[3, 0, 1], [0, 2, 0], [1, 1, 0]])
+        res = equilibrium(vals, [1, 2, 3], method="proportional_response", tol=1e-6)
+        self.assertTrue(sp.issparse(res["allocation"]))
+        dense = equilibrium(vals.toarray(), [1, 2, 3], method="proportional_response", tol=1e-6)
+        np.testing.assert_allclose(res["allocation"].toarray(), dense["allocation"], atol=1e-9)
+        self.assertAlmostEqual(sum(res["prices"]), 6, delta=1e-9)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            equilibrium([[1, 0], [0, 0]], [1, 1], method="proportional_response")
+        with self.assertRaises(ValueError):
+            equilibrium([[1]], [1], method="simplex")
+        with self.assertRaises(ValueError):
+            equilibrium([[1]], [1], method="proportional_response", max_iter=0)
+
+    def test_sweep(self):
+        rng = np.random.default_rng(0)
+        vals = rng.random((8, 5)) + 0.1
+        path = [np.linspace(1, 2, 8) + 0.01 * k for k in range(10)]
+        sweep = equilibrium_sweep(vals, path, tol=1e-6)
+        self.assertEqual(sweep["allocation"].shape, (10, 8, 5))
+        self.assertEqual(sweep["prices"].shape, (10, 5))
+        cold = [equilibrium(vals, money, method="proportional_response", tol=1e-6) for money in path]
+        np.testing.assert_allclose(sweep["prices"], [c["prices"] for c in cold], atol=0.01)
+        # Every step after the first starts next to its equilibrium
+        self.assertLess(sweep["iterations"][1:].sum(), sum(c["iterations"] for c in cold[1:]) / 2)
+        exact = equilibrium_sweep(vals, path[:3], method="cvxpy")
+        np.testing.assert_allclose(exact["prices"], sweep["prices"][:3], atol=0.01)
+        sparse = equilibrium_sweep(sp.csr_matrix(vals), path[:3], tol=1e-6)
+        self.assertTrue(sp.issparse(sparse["allocation"][0]))
+        np.testing.assert_allclose(sparse["prices"], sweep["prices"][:3], atol=1e-6)
+        with self.assertRaises(ValueError):
+            equilibrium(vals, path[0], method="proportional_response", warm_start=np.ones((2, 2)))
+
 
 if __name__ == "__main__":
     unittest.main()
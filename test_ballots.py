@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+from ballots import ballot_classes
+from EX12_5A import compute_budget_array
+from EX12_5B import compute_budget_efficient_array
+
+
+class TestBallotClasses(unittest.TestCase):
+
+    def setUp(self):
+        self.votes = np.round(np.random.default_rng(0).dirichlet(np.ones(4), size=50) * 100, 1)
+
+    def test_ballot_classes(self):
+        rng = np.random.default_rng(1)
+        votes = np.vstack([self.votes[rng.integers(0, 50, 5000)], -0.0 * self.votes[:1], 0.0 * self.votes[:1]])
+        ballots, counts, class_of = ballot_classes(votes)
+        self.assertEqual(len(counts), 51)
+        self.assertEqual(counts.sum(), len(votes))
+        np.testing.assert_array_equal(ballots[class_of], votes)
+        np.testing.assert_allclose(compute_budget_array(100, ballots, counts), compute_budget_array(100, votes))
+        np.testing.assert_allclose(compute_budget_efficient_array(100, ballots, counts),
+                                   compute_budget_efficient_array(100, votes))
+        with self.assertRaises(ValueError):
+            compute_budget_array(100, ballots, counts / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
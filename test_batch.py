@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from batch import run_batch
+from Ex3 import alloc
+from EX12_5A import compute_budget
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def test_ordered_matches_single_calls(self):
+        rng = np.random.default_rng(0)
+        mats = [rng.random((3, 2)) for _ in range(10)]
+        results = list(run_batch("egalitarian", [(mat,) for mat in mats], processes=2, chunksize=3))
+        self.assertEqual([r.index for r in results], list(range(10)))
+        for mat, r in zip(mats, results):
+            self.assertIsNone(r.error)
+            np.testing.assert_allclose(r.value, alloc(mat), atol=1e-6)
+
+    def test_unordered(self):
+        instances = [(100, [[i, 100 - i], [50, 50]]) for i in range(0, 100, 10)]
+        results = list(run_batch("budget", instances, processes=2, chunksize=2, ordered=False))
+        self.assertEqual(sorted(r.index for r in results), list(range(10)))
+        for r in results:
+            np.testing.assert_allclose(r.value, compute_budget(*instances[r.index]))
+
+    def test_errors_are_per_instance(self):
+        instances = [([[1, 2], [3, 4]], [1, 1]), ([[1, 2]], [1, 1]), ([[2, 1], [1, 2]], [5, 5])]
+        results = list(run_batch("equilibrium", instances, processes=2, chunksize=1))
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertIsNone(results[2].error)
+        self.assertAlmostEqual(sum(results[2].value["prices"]), 10, delta=0.01)
+
+    def test_in_process(self):
+        results = list(run_batch("decomposable", [([2, 2], [{0}, {1}]), ([4, 0], [{1}, {1}])], processes=1))
+        self.assertTrue(results[0].value[0])
+        self.assertFalse(results[1].value[0])
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            list(run_batch("lottery", []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import json
+import unittest
+
+from benchmarks import BENCHMARKS, compare, import_time, random_preferences, run
+from Q11 import is_decomposable_flow
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generated_budget_is_decomposable(self):
+        budget, preferences = random_preferences(50, 6, seed=3)
+        self.assertTrue(is_decomposable_flow(budget, preferences)[0])
+
+    def test_report(self):
+        report = run(sizes=[(4, 3)], repeat=1)
+        json.dumps(report)
+        self.assertEqual([r["rule"] for r in report["results"]], list(BENCHMARKS))
+        for r in report["results"]:
+            self.assertGreater(r["wall_time"], 0)
+            self.assertGreater(r["peak_memory"], 0)
+            if r["rule"] in ("alloc", "equilibrium"):
+                self.assertGreaterEqual(r["solver_time"], 0)
+            else:
+                self.assertIsNone(r["solver_time"])
+        rows = compare(report, report)
+        self.assertTrue(all(row["speedup"] == 1 for row in rows))
+        self.assertGreater(report["imports"]["import_time"], 0)
+
+    def test_import_has_no_side_effects(self):
+        result = import_time(repeat=1)
+        self.assertEqual(result["modules"], ["EX12_5A", "EX12_5B"])
+        self.assertEqual(result["stdout_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from bulk_io import csv_to_npy, load_matrix, load_preferences, save_matrix, save_preferences
+from EX12_5A import compute_budget, compute_budget_array
+from Q11 import is_decomposable_flow, is_decomposable_sparse
+
+
+class TestBulkIO(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_matrix_roundtrip(self):
+        votes = np.random.default_rng(0).random((50, 4)) * 25
+        save_matrix(self.path("votes.npy"), votes, columnar=True)
+        loaded = load_matrix(self.path("votes.npy"))
+        self.assertIsInstance(loaded, np.memmap)
+        self.assertTrue(loaded.T.flags.c_contiguous)
+        np.testing.assert_array_equal(loaded, votes)
+        np.testing.assert_allclose(compute_budget_array(100, loaded), compute_budget(100, votes.tolist()))
+
+    def test_preferences_roundtrip(self):
+        budget = [3, 1, 0, 2]
+        preferences = [{0}, {0, 1}, {3}, {0, 3}, {1, 3}, {0}]
+        save_preferences(self.path("prefs.npy"), preferences, len(budget))
+        (indptr, indices), m = load_preferences(self.path("prefs.npy"))
+        self.assertEqual(m, 4)
+        self.assertEqual([set(indices[indptr[i]:indptr[i + 1]].tolist()) for i in range(len(preferences))],
+                         preferences)
+        self.assertEqual(is_decomposable_sparse(budget, (indptr, indices))[0],
+                         is_decomposable_flow(budget, preferences)[0])
+
+    def test_csv_to_npy(self):
+        with open(self.path("votes.csv"), "w") as f:
+            f.write("a,b,c\n1,2,3\n\n4.5,5,6\n7,8,9")
+        self.assertEqual(csv_to_npy(self.path("votes.csv"), self.path("votes.npy"), skip_header=1), (3, 3))
+        np.testing.assert_array_equal(load_matrix(self.path("votes.npy")), [[1, 2, 3], [4.5, 5, 6], [7, 8, 9]])
+        with open(self.path("ragged.csv"), "w") as f:
+            f.write("1,2\n3\n")
+        with self.assertRaises(ValueError):
+            csv_to_npy(self.path("ragged.csv"), self.path("ragged.npy"))
+        # Short and long rows whose values add up to a multiple of the row length
+        for text in ("1,2\n3\n4,5,6\n", "1,2,3\n4\n5,6,7,8,9\n"):
+            with open(self.path("ragged.csv"), "w") as f:
+                f.write(text)
+            with self.assertRaises(ValueError):
+                csv_to_npy(self.path("ragged.csv"), self.path("ragged.npy"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import logging
+import unittest
+
+import numpy as np
+
+import instrumentation
+from Ex3 import alloc
+from EX12_5A import compute_budget
+from Q11 import is_decomposable_flow, is_decomposable_sparse
+from assigment3_Ex5 import equilibrium
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        instrumentation.add_sink(self.events.append)
+
+    def tearDown(self):
+        instrumentation.remove_sink(self.events.append)
+
+    def phases(self, rule):
+        return [e["phase"] for e in self.events if e["rule"] == rule]
+
+    def test_solver_phases(self):
+        alloc([[1, 2], [2, 1]], decimals=2)
+        self.assertEqual(self.phases("Ex3.alloc"), ["build", "canonicalize", "solve", "extract"])
+        solve = [e for e in self.events if e["phase"] == "solve"][0]
+        self.assertGreater(solve["iterations"], 0)
+        self.assertEqual(solve["variables"], 5)
+        equilibrium([[1, 2], [2, 1]], [1, 1])
+        self.assertEqual(self.phases("equilibrium"), ["build", "canonicalize", "solve", "extract"])
+        self.assertTrue(all(e["seconds"] >= 0 for e in self.events))
+
+    def test_python_phases(self):
+        compute_budget(100, [[50, 50], [30, 70]])
+        self.assertEqual(self.phases("compute_budget"), ["sort", "solve"])
+        is_decomposable_flow([2, 2], [{0}, {1}])
+        self.assertEqual(self.phases("is_decomposable_flow"), ["build", "solve"])
+        is_decomposable_sparse([2, 2], [{0}, {1}, {0}])
+        build = [e for e in self.events if e["rule"] == "is_decomposable_sparse"][0]
+        self.assertEqual(build["classes"], 2)
+        equilibrium([[1, 2], [2, 1]], [1, 1], method="proportional_response")
+        iterate = [e for e in self.events if e["phase"] == "iterate"][0]
+        self.assertGreaterEqual(iterate["iterations"], 1)
+
+    def test_aggregate_and_logger(self):
+        stats = instrumentation.Aggregate()
+        instrumentation.add_sink(stats)
+        try:
+            for _ in range(5):
+                compute_budget(100, [[50, 50], [30, 70]])
+            with self.assertLogs("allocation", logging.DEBUG):
+                instrumentation.add_sink(instrumentation.LoggerSink())
+                instrumentation.emit("test", "phase", seconds=0.0)
+        finally:
+            instrumentation._sinks.clear()
+            instrumentation.add_sink(self.events.append)
+        summary = stats.percentiles(q=(50, 90))
+        self.assertEqual(summary[("compute_budget", "solve")]["count"], 5)
+        self.assertLessEqual(summary[("compute_budget", "solve")]["p50"], summary[("compute_budget", "solve")]["p90"])
+
+    def test_disabled(self):
+        instrumentation.remove_sink(self.events.append)
+        try:
+            self.assertFalse(instrumentation.enabled())
+            with instrumentation.phase("rule", "phase") as fields:
+                self.assertIsNone(fields)
+            np.testing.assert_allclose(alloc([[1, 0], [0, 1]]), np.eye(2), atol=1e-6)
+            self.assertEqual(self.events, [])
+        finally:
+            instrumentation.add_sink(self.events.append)
+
+
+if __name__ == "__main__":
+    unittest.main()
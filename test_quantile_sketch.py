@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from EX12_5A import compute_budget_array, compute_budget_sketch
+from EX12_5B import compute_budget_efficient_array, compute_budget_efficient_sketch
+from quantile_sketch import QuantileSketch, weighted_order_statistics
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.votes = np.round(rng.dirichlet(np.ones(4), size=20000) * 100, 1)
+        self.chunks = [self.votes[i:i + 1000] for i in range(0, len(self.votes), 1000)]
+
+    def test_rank_error_within_eps(self):
+        sketch = QuantileSketch.from_chunks(self.chunks, eps=0.05)
+        self.assertEqual(sketch.count, len(self.votes))
+        self.assertGreater(sketch.rank_error, 0)
+        self.assertLessEqual(sketch.rank_error, 0.05 * len(self.votes))
+        n, lookup = weighted_order_statistics(*sketch.sections())
+        exact = np.sort(self.votes, axis=0)
+        for idx in (0, n // 4, n // 2, n - 1):
+            estimate = lookup(np.arange(4), idx)
+            for j in range(4):
+                rank = np.searchsorted(exact[:, j], estimate[j])
+                self.assertLessEqual(abs(rank - idx), sketch.rank_error + np.sum(exact[:, j] == estimate[j]))
+
+    def test_merge(self):
+        merged = QuantileSketch.from_chunks(self.chunks[:8], eps=0.05)
+        merged.merge(QuantileSketch.from_chunks(self.chunks[8:], eps=0.05))
+        self.assertEqual(merged.count, len(self.votes))
+        self.assertEqual(int(merged.sections()[1].sum(axis=1)[0]), len(self.votes))
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(4, eps=0.1))
+
+    def test_exact_without_compaction(self):
+        small = self.votes[:300]
+        result = compute_budget_sketch(100, [small])
+        self.assertEqual(result["rank_error"], 0)
+        np.testing.assert_allclose(result["allocation"], compute_budget_array(100, small))
+        result = compute_budget_efficient_sketch(100, [small])
+        np.testing.assert_allclose(result["allocation"], compute_budget_efficient_array(100, small))
+
+    def test_bounds_contain_exact_allocation(self):
+        sketch = QuantileSketch.from_chunks(self.chunks, eps=0.05)
+        for result, exact in ((compute_budget_sketch(100, sketch), compute_budget_array(100, self.votes)),
+                              (compute_budget_efficient_sketch(100, sketch),
+                               compute_budget_efficient_array(100, self.votes))):
+            self.assertTrue(np.all(result["lower"] <= exact + 1e-9))
+            self.assertTrue(np.all(exact <= result["upper"] + 1e-9))
+            self.assertAlmostEqual(result["allocation"].sum(), 100, delta=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
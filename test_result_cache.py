@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import scipy.sparse as sp
+
+from result_cache import ResultCache, cache_key
+from Ex3 import alloc
+from Q11 import is_decomposable_flow
+
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_rounding_and_types(self):
+        self.assertEqual(cache_key("f", ([[1, 2], [3, 4]],), {}), cache_key("f", (np.array([[1.0, 2], [3, 4]]),), {}))
+        self.assertEqual(cache_key("f", ([0.1 + 0.2],), {}), cache_key("f", ([0.3],), {}))
+        self.assertEqual(cache_key("f", ([-0.0],), {}), cache_key("f", ([0.0],), {}))
+        self.assertNotEqual(cache_key("f", ([1, 2],), {}), cache_key("f", ([2, 1],), {}))
+        self.assertNotEqual(cache_key("f", ([1, 2],), {}), cache_key("g", ([1, 2],), {}))
+        self.assertNotEqual(cache_key("f", (1,), {"tol": 1e-3}), cache_key("f", (1,), {"tol": 1e-4}))
+        self.assertNotEqual(cache_key("f", (["1"],), {}), cache_key("f", ([1],), {}))
+        self.assertNotEqual(cache_key("f", ([0.5],), {}, decimals=2), cache_key("f", ([0.5],), {}, decimals=9))
+
+    def test_sets_and_sparse(self):
+        self.assertEqual(cache_key("f", ([2, 2], [{1, 0}, {1}]), {}), cache_key("f", ([2, 2], [{0, 1}, {1}]), {}))
+        dense = np.array([[0, 1.5], [2, 0]])
+        self.assertEqual(cache_key("f", (sp.csr_matrix(dense),), {}), cache_key("f", (sp.coo_matrix(dense),), {}))
+        with self.assertRaises(TypeError):
+            cache_key("f", (object(),), {})
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_memory_tier(self):
+        cache = ResultCache(max_memory_items=2)
+        cached_alloc = cache.wrap(alloc)
+        first = cached_alloc([[1, 2], [2, 1]])
+        first[0, 0] = 99
+        np.testing.assert_allclose(cached_alloc([[1, 2], [2, 1]]), alloc([[1, 2], [2, 1]]), atol=1e-6)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cached_alloc([[1, 3], [2, 1]])
+        cached_alloc([[1, 4], [2, 1]])
+        self.assertEqual(len(cache), 2)
+        cached_alloc([[1, 2], [2, 1]])
+        self.assertEqual(cache.misses, 4)
+
+    def test_disk_tier_shared_across_precisions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.sqlite")
+            coarse = ResultCache(path, decimals=2)
+            self.assertEqual(coarse.wrap(lambda x: x * 1000, "f")(0.123), 123.0)
+            coarse.close()
+            fine = ResultCache(path, decimals=9)
+            self.assertAlmostEqual(fine.wrap(lambda x: x * 1000, "f")(0.12), 120.0)
+            self.assertEqual(fine.disk_hits, 0)
+            fine.close()
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.sqlite")
+            cache = ResultCache(path, max_disk_items=3)
+            cached = cache.wrap(is_decomposable_flow)
+            expected = cached([2, 2], [{0}, {1}])
+            cache.close()
+
+            cache = ResultCache(path, max_disk_items=3)
+            cached = cache.wrap(is_decomposable_flow)
+            self.assertEqual(cached([2, 2], [{0}, {1}]), expected)
+            self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (1, 1, 0))
+            for amount in range(1, 5):
+                cached([amount, 0], [{0}, {0}])
+            self.assertEqual(len(cache), 3)
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import unittest
+
+import numpy as np
+
+from Ex3 import alloc
+from service import AllocationService, RULES, ServiceOverloaded
+
+
+class TestAllocationService(unittest.IsolatedAsyncioTestCase):
+
+    async def test_coalescing(self):
+        async with AllocationService(batch_window=0.01) as service:
+            mat = [[1, 2, 3], [3, 2, 1]]
+            results = await asyncio.gather(*(service.alloc(mat) for _ in range(5)))
+            self.assertEqual(service.stats["coalesced"], 4)
+            self.assertEqual(service.stats["computations"], 1)
+            for res in results:
+                np.testing.assert_allclose(res, alloc(mat), atol=1e-6)
+            self.assertEqual(service.pending, 0)
+
+    async def test_batching_by_shape(self):
+        async with AllocationService(batch_window=0.05, max_batch=4) as service:
+            rng = np.random.default_rng(0)
+            mats = [rng.random((3, 2)) for _ in range(6)]
+            results = await asyncio.gather(*(service.alloc(mat) for mat in mats),
+                                           service.alloc(rng.random((2, 2))))
+            self.assertEqual(service.stats["batches"], 3)
+            for mat, res in zip(mats, results):
+                np.testing.assert_allclose(res, alloc(mat), atol=1e-6)
+
+    async def test_errors_stay_per_request(self):
+        async with AllocationService() as service:
+            good, bad, flow = await asyncio.gather(service.equilibrium([[1, 2], [2, 1]], [1, 1]),
+                                                   service.equilibrium([[1, 2], [2, 1]], [1, 1, 1]),
+                                                   service.is_decomposable_flow([2, 2], [{0}, {1}]),
+                                                   return_exceptions=True)
+            self.assertAlmostEqual(sum(good["prices"]), 2, delta=0.01)
+            self.assertIsInstance(bad, ValueError)
+            self.assertTrue(flow[0])
+            with self.assertRaises(ValueError):
+                await service.submit("lottery")
+
+    async def test_malformed_request_is_not_left_pending(self):
+        async with AllocationService(max_pending=1) as service:
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    await service.alloc([[1, 2], [3]], timeout=1)
+                self.assertEqual(service.pending, 0)
+            np.testing.assert_allclose(await service.alloc([[1, 0], [0, 1]]), np.eye(2), atol=1e-6)
+
+    async def test_only_exact_duplicates_coalesce(self):
+        async with AllocationService() as service:
+            await asyncio.gather(service.equilibrium([[1, 2], [2, 1]], [1, 1]),
+                                 service.equilibrium([[1, 2], [2, 1]], [1, 1 + 1e-10]))
+            self.assertEqual(service.stats["coalesced"], 0)
+            self.assertEqual(service.stats["computations"], 2)
+
+    async def test_timeout_and_backpressure(self):
+        release = threading.Event()
+        rules = dict(RULES, wait=lambda x: release.wait(5) and x)
+        async with AllocationService(max_pending=1, rules=rules) as service:
+            first = asyncio.ensure_future(service.submit("wait", 1))
+            await asyncio.sleep(0)
+            with self.assertRaises(asyncio.TimeoutError):
+                await service.submit("wait", 1, timeout=0.01)
+            with self.assertRaises(ServiceOverloaded):
+                await service.submit("wait", 2)
+            release.set()
+            self.assertEqual(await first, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()